@@ -21,23 +21,65 @@
 # SOFTWARE.
 
 import os
+import time
 import logging
 import asyncio
+import argparse
+
+# measured before the heavy client imports below
+STARTUP_TIME = time.perf_counter()
 
 from dotenv import load_dotenv
 from src.mcp_client import StdioClient
+from src.tool_cache import ToolResultCache, DEFAULT_TOOL_TTLS
+from src.answer_cache import AnswerCache, QueryEmbedder
+from src.context_manager import ContextManager
+from src.model_router import ModelRouter
+from utils.model_management import RequestScheduler
 
 _ = load_dotenv()
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
-async def main():
+IMPORT_TIME = time.perf_counter() - STARTUP_TIME
+
+async def main(args: argparse.Namespace):
 
     model_name = os.getenv("MODEL_NAME")
     api_key = os.getenv("OPENAI_API_KEY")
 
-    mcp_client = StdioClient(model_name, api_key)
+    # Per-tool TTLs override the defaults, e.g. TOOL_CACHE_TTLS="google_search=60"
+    tool_cache = ToolResultCache(
+        max_size=int(os.getenv("TOOL_CACHE_SIZE", "512")),
+        ttls={**DEFAULT_TOOL_TTLS, **ToolResultCache.parse_ttls(os.getenv("TOOL_CACHE_TTLS", ""))},
+        default_ttl=float(os.getenv("TOOL_CACHE_DEFAULT_TTL", "120"))
+    )
+
+    # Enabled by ANSWER_CACHE_PATH, shared with the ingestion for invalidation
+    answer_cache = AnswerCache.from_env()
+    embedder = QueryEmbedder(os.getenv("EMBEDDING_SERVER")) if answer_cache is not None else None
+
+    mcp_client = StdioClient(
+        model_name,
+        api_key,
+        speculative_retrieval=os.getenv("SPECULATIVE_RETRIEVAL", "0") == "1",
+        speculation_threshold=float(os.getenv("SPECULATION_THRESHOLD", "0.5")),
+        tool_timeout=float(os.getenv("TOOL_TIMEOUT", "30")),
+        tool_cache=tool_cache,
+        answer_cache=answer_cache,
+        embedder=embedder,
+        context_manager=ContextManager(token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))),
+        # Tool-deciding turns go to FAST_MODEL_NAME when it is set
+        router=ModelRouter(model_name, os.getenv("FAST_MODEL_NAME") or None),
+        # Provider limits per minute, 0 leaves the budget unlimited
+        scheduler=RequestScheduler(
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+            tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "5"))
+        )
+    )
 
     # Configure the server parameters
     server_configs = {
@@ -46,7 +88,11 @@ async def main():
             "transport": "stdio",
             "args": [
                 "src/weaviate_server.py"
-            ]
+            ],
+            # the server traces its stages into the agent's trace file, its metrics
+            # are read through the MCP resource instead of a file of its own
+            "env": {name: value for name, value in os.environ.items()
+                    if name.startswith("TELEMETRY_") and name != "TELEMETRY_METRICS_FILE"}
         },
         "google_search": {
            "command": "node",
@@ -63,13 +109,52 @@ async def main():
 
     try:
         # Set up MCP servers
+        setup_time = time.perf_counter() - STARTUP_TIME - IMPORT_TIME
         _ = await mcp_client.connect_to_servers(server_configs)
-
-        # Get in indefinite loop of QA.
-        _ = await mcp_client.initiate_cycle()
+        mcp_client.start_health_checks(float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30")))
+
+        # Servers that failed to start are listed as unavailable
+        logger.info(
+            f"Startup took {time.perf_counter() - STARTUP_TIME:.2f}s: imports={IMPORT_TIME:.2f}s, "
+            f"setup={setup_time:.2f}s, " + ", ".join(
+                f"{name}={seconds:.2f}s" if seconds is not None else f"{name}=unavailable"
+                for name, seconds in mcp_client.startup_timings.items()
+            )
+        )
+
+        if args.serve:
+            # Serve many users concurrently over the same client and MCP sessions
+            from src.agent_server import AgentServer
+
+            server = AgentServer(
+                mcp_client,
+                max_sessions=args.max_sessions,
+                max_waiting=args.max_waiting,
+                session_timeout=args.session_timeout
+            )
+            _ = await server.serve(args.host, args.port)
+        else:
+            # Get in indefinite loop of QA.
+            _ = await mcp_client.initiate_cycle()
 
     except Exception as e:
         logger.error(f"Error took place in the agent using MCP client.\n{str(e)}")
 
+    finally:
+        # Shut the server processes down with their sessions
+        await mcp_client.close()
+
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Mongolian legal ReAct agent.")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve concurrent users over HTTP with SSE instead of the terminal loop")
+    parser.add_argument("--host", default=os.getenv("AGENT_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("AGENT_PORT", "8000")))
+    parser.add_argument("--max-sessions", type=int, default=int(os.getenv("AGENT_MAX_SESSIONS", "16")),
+                        help="sessions handled at the same time")
+    parser.add_argument("--max-waiting", type=int, default=int(os.getenv("AGENT_MAX_WAITING", "64")),
+                        help="sessions queued before new ones are refused")
+    parser.add_argument("--session-timeout", type=float, default=float(os.getenv("AGENT_SESSION_TIMEOUT", "300")))
+
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,189 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import uuid
+import asyncio
+import logging
+import uvicorn
+
+from typing import Any, AsyncIterator, Dict
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.mcp_client import StdioClient
+from utils.telemetry import telemetry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+class AgentServer:
+    """
+    HTTP front of the agent that runs many user sessions concurrently on one
+    event loop. Every session is an independent `handle_request` over the shared
+    model client and MCP sessions of one StdioClient, streamed back as server-sent
+    events. At most `max_sessions` run at once, up to `max_waiting` more are queued
+    and the rest are refused. A session is cancelled by DELETE /sessions/{id},
+    by its timeout or when its client disconnects.
+
+    Endpoints:
+        POST /ask {"query": "..."}    SSE stream of session, started, message,
+                                      tools, answer, error and done events
+        DELETE /sessions/{id}         cancels a running session
+        GET /health                   load and MCP server status
+        GET /metrics                  Prometheus metrics of the agent and its MCP
+                                      servers (with TELEMETRY_ENABLED=1)
+    """
+
+    def __init__(self, mcp_client: StdioClient, max_sessions: int = 16,
+                 max_waiting: int = 64, session_timeout: float = 300.0) -> None:
+        self.mcp_client = mcp_client
+        self.max_sessions = max_sessions
+        self.max_waiting = max_waiting
+        self.session_timeout = session_timeout
+
+        self.sessions: Dict[str, asyncio.Task] = {}
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self._slots = asyncio.Semaphore(max_sessions)
+
+        self.app = Starlette(routes=[
+            Route("/ask", self.ask, methods=["POST"]),
+            Route("/sessions/{session_id}", self.cancel, methods=["DELETE"]),
+            Route("/health", self.health, methods=["GET"]),
+            Route("/metrics", self.metrics, methods=["GET"])
+        ])
+
+    async def _run_session(self, session_id: str, query: str, queue: asyncio.Queue) -> None:
+        def on_event(event: str, data: Dict[str, Any]) -> None:
+            queue.put_nowait((event, data))
+
+        # counted as waiting by `ask` until a slot is free
+        status = "completed"
+        is_waiting = True
+        try:
+            async with self._slots:
+                self.waiting -= 1
+                is_waiting = False
+                self.running += 1
+                try:
+                    on_event("started", {})
+                    context = [
+                        { "role" : "system" , "content" : self.mcp_client.system },
+                        { "role" : "user", "content": query }
+                    ]
+                    await asyncio.wait_for(self.mcp_client.handle_request(context, on_event, session_id),
+                                           self.session_timeout)
+                finally:
+                    self.running -= 1
+
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except asyncio.CancelledError:
+            status = "cancelled"
+            self.cancelled += 1
+            raise
+        except Exception as err:
+            logger.error(f"Session {session_id} failed: {str(err)}")
+            status = "failed"
+        finally:
+            if is_waiting:
+                self.waiting -= 1
+            if status == "completed":
+                self.completed += 1
+            queue.put_nowait(("done", {"status": status}))
+
+    async def ask(self, request: Request) -> Response:
+        try:
+            query = str((await request.json())["query"]).strip()
+        except (ValueError, KeyError, TypeError):
+            return JSONResponse({"error": 'expected a JSON body {"query": "..."}'}, status_code=400)
+
+        if not query:
+            return JSONResponse({"error": "empty query"}, status_code=400)
+
+        if self.waiting >= self.max_waiting:
+            return JSONResponse({"error": "too many sessions, try again later"}, status_code=429)
+
+        session_id = uuid.uuid4().hex
+        queue: asyncio.Queue = asyncio.Queue()
+        self.waiting += 1
+        task = asyncio.create_task(self._run_session(session_id, query, queue))
+        self.sessions[session_id] = task
+
+        async def stream() -> AsyncIterator[str]:
+            try:
+                yield _sse("session", {"session_id": session_id})
+                while True:
+                    event, data = await queue.get()
+                    yield _sse(event, data)
+                    if event == "done":
+                        break
+            finally:
+                # the client went away before the session ended
+                if not task.done():
+                    task.cancel()
+                self.sessions.pop(session_id, None)
+
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def cancel(self, request: Request) -> Response:
+        task = self.sessions.get(request.path_params["session_id"])
+        if task is None or task.done():
+            return JSONResponse({"error": "no such running session"}, status_code=404)
+
+        task.cancel()
+        return JSONResponse({"status": "cancelling"}, status_code=202)
+
+    async def health(self, request: Request) -> Response:
+        return JSONResponse({
+            "status": "ok",
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "max_sessions": self.max_sessions,
+            "servers": {name: session.is_connected for name, session in self.mcp_client.sessions.items()},
+            "scheduler": self.mcp_client.scheduler.stats() if self.mcp_client.scheduler is not None else None
+        })
+
+    async def metrics(self, request: Request) -> Response:
+        # every process prefixes its metric names, so the texts concatenate cleanly
+        server_texts = await asyncio.gather(*[session.metrics() for session in self.mcp_client.sessions.values()])
+        return PlainTextResponse(telemetry.prometheus_text() + "".join(server_texts),
+                                 media_type="text/plain; version=0.0.4")
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        """
+        Serves the API on the running event loop until the process is stopped.
+        """
+        config = uvicorn.Config(self.app, host=host, port=port, log_level="info")
+        await uvicorn.Server(config).serve()
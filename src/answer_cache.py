@@ -0,0 +1,251 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import time
+import httpx
+import sqlite3
+import logging
+import threading
+import numpy as np
+
+from typing import List, Dict, Any, Iterable, Optional
+
+from src.article_index import ArticleKey
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+class AnswerCache:
+    """
+    Semantic cache of final agent answers keyed on the query embedding. An answer
+    is returned for a new query whose embedding is within `threshold` cosine
+    similarity of a cached one, without calling the model.
+
+    Entries live in a SQLite file shared by the agent and the storage backends:
+    re-ingesting or deleting an article removes every answer that cited it, and
+    the agent notices writes of other processes through `PRAGMA data_version`.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.92, max_size: int = 1024) -> None:
+        self.path = path
+        self.threshold = threshold
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS answer_articles (
+                answer_id INTEGER NOT NULL REFERENCES answers(id) ON DELETE CASCADE,
+                document TEXT NOT NULL,
+                chapter TEXT NOT NULL,
+                article TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS answer_articles_key ON answer_articles (document, chapter, article);
+        """)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.commit()
+
+        # normalized query vectors of all entries, reloaded after any write
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors: Optional[np.ndarray] = None
+        self._version: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["AnswerCache"]:
+        """
+        Opens the cache at ANSWER_CACHE_PATH with ANSWER_CACHE_THRESHOLD and
+        ANSWER_CACHE_SIZE, or returns None when the path is unset.
+        """
+        path = os.getenv("ANSWER_CACHE_PATH")
+        if not path:
+            return None
+
+        return cls(
+            path,
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+            max_size=int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+        )
+
+    def _refresh(self) -> None:
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if self._vectors is not None and version == self._version:
+            return
+
+        rows = self._db.execute("SELECT id, vector FROM answers ORDER BY id").fetchall()
+        self._ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._vectors = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+        self._version = version
+
+    def lookup(self, vector: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached answer closest to the query vector when it is similar enough.
+        Returns:
+            Optional[Dict[str, Any]]: query, answer, similarity and cited articles of the hit
+        """
+        query_vector = _normalize(vector)
+
+        with self._lock:
+            self._refresh()
+            if self._vectors is None or self._vectors.shape[1] != query_vector.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors @ query_vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            answer_id = int(self._ids[best])
+            row = self._db.execute("SELECT query, answer FROM answers WHERE id = ?", (answer_id,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            articles = self._db.execute(
+                "SELECT document, chapter, article FROM answer_articles WHERE answer_id = ?", (answer_id,)
+            ).fetchall()
+            self._db.execute("UPDATE answers SET used_at = ? WHERE id = ?", (time.time(), answer_id))
+            self._db.commit()
+
+            self.hits += 1
+            return {
+                "query": row[0],
+                "answer": row[1],
+                "similarity": float(similarities[best]),
+                "articles": [tuple(article) for article in articles]
+            }
+
+    def store(self, query: str, vector: List[float], answer: str, articles: Iterable[ArticleKey]) -> None:
+        """
+        Caches a final answer together with the articles it was based on.
+        """
+        articles = sorted(set(articles))
+        now = time.time()
+
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO answers (query, vector, answer, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (query, _normalize(vector).tobytes(), answer, now, now)
+            )
+            self._db.executemany(
+                "INSERT INTO answer_articles (answer_id, document, chapter, article) VALUES (?, ?, ?, ?)",
+                [(cursor.lastrowid, *article) for article in articles]
+            )
+
+            # keep the most recently used entries
+            self._db.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY used_at DESC LIMIT ?)",
+                (self.max_size,)
+            )
+            self._db.commit()
+            self._vectors = None
+
+    def invalidate_articles(self, articles: Iterable[ArticleKey]) -> int:
+        """
+        Drops every answer citing one of the articles.
+        Returns:
+            int: number of dropped answers
+        """
+        articles = set(articles)
+        if not articles:
+            return 0
+
+        with self._lock:
+            answer_ids = set()
+            for article in articles:
+                answer_ids.update(row[0] for row in self._db.execute(
+                    "SELECT answer_id FROM answer_articles WHERE document = ? AND chapter = ? AND article = ?",
+                    article
+                ))
+            return self._drop(answer_ids)
+
+    def invalidate_documents(self, pattern: str) -> int:
+        """
+        Drops every answer citing an article of the documents matching the pattern,
+        which uses the wildcards (`*`, `?`) of Weaviate's `like` filter.
+        """
+        with self._lock:
+            answer_ids = {row[0] for row in self._db.execute(
+                "SELECT answer_id FROM answer_articles WHERE document GLOB ?", (pattern,)
+            )}
+            return self._drop(answer_ids)
+
+    def _drop(self, answer_ids: Iterable[int]) -> int:
+        answer_ids = list(answer_ids)
+        if answer_ids:
+            self._db.executemany("DELETE FROM answers WHERE id = ?", [(answer_id,) for answer_id in answer_ids])
+            self._db.commit()
+            self._vectors = None
+            self.invalidations += len(answer_ids)
+            logger.info(f"Invalidated {len(answer_ids)} cached answer(s)")
+
+        return len(answer_ids)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "size": size
+        }
+
+    def close(self) -> None:
+        logger.info(f"Answer cache stats: {self.stats()}")
+        self._db.close()
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+class QueryEmbedder:
+    """
+    Embeds user queries on the agent side through the /embed server of the storage backends.
+    """
+
+    def __init__(self, embedding_host: str, timeout: float = 10.0) -> None:
+        self.embedding_url = f"http://{embedding_host}/embed"
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def encode(self, query: str) -> List[float]:
+        response = await self.client.post(self.embedding_url, json={"inputs": [query]})
+        response.raise_for_status()
+        return response.json()[0]
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,169 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import sys
+import bisect
+import fnmatch
+import logging
+
+from typing import List, Dict, Tuple, Iterable, Optional, Any
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+ArticleKey = Tuple[str, str, str]
+
+# Headings DocumentManager.chunk_articles puts before the chunk bodies: the
+# labelled one of the leading chunks and the short one of an article's last chunk
+ARTICLE_HEADING_PATTERN = re.compile(
+    r"^(?:ХАРГАЛЗАХ ХУУЛЬ: \((?P<document>[^\n]+?)/БҮЛГИЙН НЭР: (?P<chapter>[^\n]*?)/ЗҮЙЛИЙН НЭР:(?P<article>[^\n]*)"
+    r"|\((?P<short_document>[^\n]+?\.docx)/(?P<short_chapter>[^\n/]*)/(?P<short_article>[^\n]*))\)$",
+    re.MULTILINE
+)
+
+def parse_article_keys(text: str) -> List[ArticleKey]:
+    """
+    Returns the unique keys of the articles whose chunks appear in a search result text.
+    """
+    keys = []
+    for match in ARTICLE_HEADING_PATTERN.finditer(text):
+        if match.group("document") is not None:
+            keys.append(match.group("document", "chapter", "article"))
+        else:
+            keys.append(match.group("short_document", "short_chapter", "short_article"))
+
+    return list(dict.fromkeys(keys))
+
+class ArticleIndex:
+    """
+    In-memory mapping of (document, chapter, article) to the ordered list of
+    (order_id, chunk_body) pairs of that article. Context expansion of a search
+    hit then becomes a dictionary lookup instead of a round trip to the database.
+    """
+
+    def __init__(self) -> None:
+        self._articles: Dict[ArticleKey, List[Tuple[int, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def __contains__(self, key: ArticleKey) -> bool:
+        return key in self._articles
+
+    @staticmethod
+    def key_of(properties: Dict[str, Any]) -> ArticleKey:
+        return (properties["document"], properties["chapter"], properties["article"])
+
+    def add(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        """
+        Adds chunk properties to the index, keeping every article ordered by
+        `order_id`. A chunk with an already indexed `order_id` replaces the old one.
+        """
+        for chunk in chunks:
+            entries = self._articles.setdefault(self.key_of(chunk), [])
+            entry = (chunk["order_id"], chunk["chunk_body"])
+
+            position = bisect.bisect_left(entries, (entry[0],))
+            if position < len(entries) and entries[position][0] == entry[0]:
+                entries[position] = entry
+            else:
+                entries.insert(position, entry)
+
+    def remove(self, chunks: Iterable[Dict[str, Any]]) -> None:
+        """
+        Drops single chunks, identified by their article and `order_id`.
+        """
+        for chunk in chunks:
+            key = self.key_of(chunk)
+            entries = self._articles.get(key)
+            if entries is None:
+                continue
+
+            entries[:] = [entry for entry in entries if entry[0] != chunk["order_id"]]
+            if not entries:
+                del self._articles[key]
+
+    def discard(self, key: ArticleKey) -> None:
+        self._articles.pop(key, None)
+
+    def has_chunk(self, properties: Dict[str, Any]) -> bool:
+        """
+        Whether the index holds the chunk of a search hit with the same text,
+        which tells a current article entry from one written over by an ingestion.
+        """
+        entries = self._articles.get(self.key_of(properties))
+        if entries is None:
+            return False
+
+        position = bisect.bisect_left(entries, (properties["order_id"],))
+        return position < len(entries) and entries[position] == (properties["order_id"], properties["chunk_body"])
+
+    def remove_document(self, pattern: str) -> int:
+        """
+        Drops every article whose document matches the pattern with the
+        same wildcards (`*`, `?`) as Weaviate's `like` filter.
+        Returns:
+            int: number of removed articles
+        """
+        keys = [key for key in self._articles if fnmatch.fnmatchcase(key[0], pattern)]
+        for key in keys:
+            del self._articles[key]
+
+        return len(keys)
+
+    def get(self, key: ArticleKey) -> Optional[str]:
+        entries = self._articles.get(key)
+        if entries is None:
+            return None
+
+        return "\n".join([chunk_body for _, chunk_body in entries])
+
+    def chunk_count(self) -> int:
+        return sum(len(entries) for entries in self._articles.values())
+
+    def memory_footprint(self) -> int:
+        """
+        Approximate number of bytes held by the index, including keys and chunk texts.
+        """
+        size = sys.getsizeof(self._articles)
+        for key, entries in self._articles.items():
+            size += sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+            size += sys.getsizeof(entries)
+            for order_id, chunk_body in entries:
+                size += sys.getsizeof((order_id, chunk_body)) + sys.getsizeof(order_id) + sys.getsizeof(chunk_body)
+
+        return size
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "articles": len(self._articles),
+            "chunks": self.chunk_count(),
+            "bytes": self.memory_footprint()
+        }
+
+def log_index_footprint(index: ArticleIndex) -> None:
+    stats = index.stats()
+    logger.info(
+        f"Article index: {stats['articles']} articles, {stats['chunks']} chunks, "
+        f"{stats['bytes'] / 1024 / 1024:.2f} MiB"
+    )
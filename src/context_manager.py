@@ -0,0 +1,137 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import hashlib
+import logging
+
+from typing import List, Dict, Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+from src.article_index import ARTICLE_HEADING_PATTERN
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+TOOL_RESPONSE_PATTERN = re.compile(
+    r"^TOOL RESPONSE SAYS \((?P<name>[^,)]+)[^)]*\):\n(?:You already made this exact call[^\n]*\n)?"
+)
+COMPACTED_MARKER = "[COMPACTED]"
+
+def count_tokens(text: str) -> int:
+    """
+    Number of tokens of the text, with tiktoken when it is installed and otherwise
+    estimated from the UTF-8 size (about 4 bytes per token, i.e. 2 Cyrillic letters).
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+
+    return len(text.encode("utf-8")) // 4 + 1
+
+class ContextManager:
+    """
+    Keeps the context of a request within a token budget before every model turn.
+
+    The system prompt (with the rendered tool list) and the user query are never
+    touched, so they stay a byte-identical prefix that provider-side prompt caching
+    can reuse. Older tool responses are deduplicated and compacted in place, which
+    keeps the compacted history identical across the following turns as well.
+    """
+
+    def __init__(self, token_budget: int = 12000, keep_recent: int = 2, compact_chars: int = 600) -> None:
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.compact_chars = compact_chars
+
+    @staticmethod
+    def _tool_response(message: Dict[str, str]) -> Optional[re.Match]:
+        if message["role"] != "assistant":
+            return None
+        return TOOL_RESPONSE_PATTERN.match(message["content"])
+
+    def _body_key(self, message: Dict[str, str], match: re.Match) -> str:
+        body = message["content"][match.end():]
+        return hashlib.sha256(f"{match.group('name')}\x00{body}".encode("utf-8")).hexdigest()
+
+    def _compact(self, message: Dict[str, str], match: re.Match) -> None:
+        """
+        Shrinks a tool response to its beginning and the headings of the articles
+        it contained, so that the model can still cite them or search them again.
+        """
+        body = message["content"][match.end():]
+        if body.startswith(COMPACTED_MARKER) or len(body) <= self.compact_chars:
+            return
+
+        headings = list(dict.fromkeys(heading.group(0) for heading in ARTICLE_HEADING_PATTERN.finditer(body)))
+        excerpt = body[:self.compact_chars].rstrip()
+
+        lines = [f"{COMPACTED_MARKER} {len(body)} characters shortened, call the tool again for the full text.", excerpt + " ..."]
+        if headings:
+            lines.append("Articles in the full response:")
+            lines.extend(headings)
+
+        message["content"] = f"TOOL RESPONSE SAYS ({match.group('name')}):\n" + "\n".join(lines)
+
+    def prepare(self, context: List[Dict[str, str]]) -> Dict[str, int]:
+        """
+        Deduplicates and compacts the tool responses of the context in place until
+        it fits the token budget, always sparing the `keep_recent` latest ones.
+        Returns:
+            Dict[str, int]: prompt, prefix (system and user query) and removed tokens
+        """
+        before = sum(count_tokens(message["content"]) for message in context)
+
+        # an identical response seen again later only needs to be read once
+        tool_messages = [(index, match) for index, message in enumerate(context)
+                         if (match := self._tool_response(message)) is not None]
+        latest = {}
+        for index, match in tool_messages:
+            latest[self._body_key(context[index], match)] = index
+        for index, match in tool_messages:
+            key = self._body_key(context[index], match)
+            omitted = f"TOOL RESPONSE SAYS ({match.group('name')}):\nSame as a later response of this tool, omitted."
+            if latest[key] != index and len(omitted) < len(context[index]["content"]):
+                context[index]["content"] = omitted
+
+        total = sum(count_tokens(message["content"]) for message in context)
+        older = tool_messages[:-self.keep_recent] if self.keep_recent else tool_messages
+        for index, _ in older:
+            if total <= self.token_budget:
+                break
+
+            match = self._tool_response(context[index])
+            if match is None:
+                continue
+            size = count_tokens(context[index]["content"])
+            self._compact(context[index], match)
+            total -= size - count_tokens(context[index]["content"])
+
+        prefix = sum(count_tokens(message["content"]) for message in context[:2])
+        if total > self.token_budget:
+            logger.warning(f"Context of {total} tokens exceeds the budget of {self.token_budget} after compaction")
+
+        return {"prompt": total, "prefix": prefix, "removed": before - total}
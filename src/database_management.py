@@ -20,94 +20,290 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import requests
+import os
+import time
+import httpx
+import asyncio
 import logging
 import weaviate
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
 
-from langchain_core.documents import Document
-from weaviate.classes.config import Property, DataType
-from weaviate.classes.query import MetadataQuery, Filter
+from weaviate.classes.config import Property, DataType, Configure, Reconfigure
+from weaviate.collections.classes.config import PQConfig, BQConfig, SQConfig, RQConfig
+from weaviate.classes.data import DataObject
+from weaviate.classes.query import MetadataQuery, Filter, HybridFusion
 from weaviate.exceptions import WeaviateQueryError
+from src.answer_cache import AnswerCache
+from src.embedding_cache import EmbeddingCache
+from src.article_index import ArticleIndex, log_index_footprint
+from utils.telemetry import telemetry
+from src.storage_backend import (StorageBackend, EMBED_BATCH_SIZE, EMBED_MAX_IN_FLIGHT,
+                                 chunk_uuid, chunk_properties)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
-class DatabaseManager:
+# Upper bound on chunks fetched for an article missing from the article index
+MAX_ARTICLE_CHUNKS = 100
 
-    def __init__(self, embedding_host: str) -> None:
-        self.collection_name = "LawDocuments"
+# Seconds between the comparisons of the stored chunk count with the article
+# index of the async manager, which misses the writes of other processes
+ARTICLE_INDEX_CHECK_INTERVAL = 30.0
+
+# Properties searched by the BM25 half of hybrid queries
+HYBRID_QUERY_PROPERTIES = ["chunk_body", "article"]
+
+# Weaviate's QUERY_MAXIMUM_RESULTS default, the deepest `offset + limit` a filtered query may reach
+QUERY_MAXIMUM_RESULTS = 10000
+
+# Properties compared when diffing the chunks of a document against the stored ones
+STORED_CHUNK_PROPERTIES = ["order_id", "document", "chapter", "article", "content_hash"]
+
+LAW_DOCUMENT_PROPERTIES = [
+    Property(name="order_id", data_type=DataType.INT),
+    Property(name="document", data_type=DataType.TEXT),
+    Property(name="chapter", data_type=DataType.TEXT),
+    Property(name="article", data_type=DataType.TEXT),
+    Property(name="chunk_body", data_type=DataType.TEXT),
+    Property(name="content_hash", data_type=DataType.TEXT, skip_vectorization=True)
+]
+
+# Vector compression of the collection: `none` keeps the float32 vectors
+QUANTIZERS = ["none", "pq", "bq"]
+
+def _quantizer_name(quantizer: Any) -> str:
+    if isinstance(quantizer, PQConfig):
+        return "pq"
+    if isinstance(quantizer, BQConfig):
+        return "bq"
+    if isinstance(quantizer, SQConfig):
+        return "sq"
+    if isinstance(quantizer, RQConfig):
+        return "rq"
+    return "none"
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+class VectorIndexSettings:
+    """
+    HNSW parameters and vector compression of the collection's vector index.
+    Values left as None keep Weaviate's defaults. `ef`, `rescore_limit` and turning
+    on a quantizer can be changed on an existing collection; `ef_construction`,
+    `max_connections` and the PQ parameters only take effect when it is created.
+
+    Args:
+        ef (Optional[int]): size of the candidate list searched per query (-1 for dynamic ef)
+        ef_construction (Optional[int]): size of the candidate list while building the graph
+        max_connections (Optional[int]): edges kept per node of the graph
+        quantizer (Optional[str]): `none`, `pq` (product) or `bq` (binary quantization)
+        rescore_limit (Optional[int]): BQ candidates rescored with the uncompressed vectors
+        pq_segments (Optional[int]): PQ segments, a divisor of the vector dimensions
+        pq_training_limit (Optional[int]): vectors the PQ codebook is trained on
+    """
+
+    def __init__(self, ef: Optional[int] = None, ef_construction: Optional[int] = None,
+                 max_connections: Optional[int] = None, quantizer: Optional[str] = None,
+                 rescore_limit: Optional[int] = None, pq_segments: Optional[int] = None,
+                 pq_training_limit: Optional[int] = None) -> None:
+        if quantizer is not None and quantizer not in QUANTIZERS:
+            raise ValueError(f"Unknown quantizer {quantizer!r}, expected one of {QUANTIZERS}")
+
+        self.ef = ef
+        self.ef_construction = ef_construction
+        self.max_connections = max_connections
+        self.quantizer = quantizer
+        self.rescore_limit = rescore_limit
+        self.pq_segments = pq_segments
+        self.pq_training_limit = pq_training_limit
+
+    @classmethod
+    def from_env(cls) -> "VectorIndexSettings":
+        """
+        Builds the settings from WEAVIATE_HNSW_EF, WEAVIATE_HNSW_EF_CONSTRUCTION,
+        WEAVIATE_HNSW_MAX_CONNECTIONS, WEAVIATE_QUANTIZER, WEAVIATE_RESCORE_LIMIT,
+        WEAVIATE_PQ_SEGMENTS and WEAVIATE_PQ_TRAINING_LIMIT.
+        """
+        return cls(
+            ef=_optional_int("WEAVIATE_HNSW_EF"),
+            ef_construction=_optional_int("WEAVIATE_HNSW_EF_CONSTRUCTION"),
+            max_connections=_optional_int("WEAVIATE_HNSW_MAX_CONNECTIONS"),
+            quantizer=os.getenv("WEAVIATE_QUANTIZER", "").lower() or None,
+            rescore_limit=_optional_int("WEAVIATE_RESCORE_LIMIT"),
+            pq_segments=_optional_int("WEAVIATE_PQ_SEGMENTS"),
+            pq_training_limit=_optional_int("WEAVIATE_PQ_TRAINING_LIMIT")
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: value for name, value in vars(self).items() if value is not None}
+
+    def create_config(self) -> Any:
+        """
+        Returns the vector index configuration for creating the collection.
+        """
+        quantizer = None
+        if self.quantizer == "none":
+            quantizer = Configure.VectorIndex.Quantizer.none()
+        elif self.quantizer == "pq":
+            quantizer = Configure.VectorIndex.Quantizer.pq(
+                segments=self.pq_segments,
+                training_limit=self.pq_training_limit
+            )
+        elif self.quantizer == "bq":
+            quantizer = Configure.VectorIndex.Quantizer.bq(rescore_limit=self.rescore_limit)
+
+        return Configure.VectorIndex.hnsw(
+            ef=self.ef,
+            ef_construction=self.ef_construction,
+            max_connections=self.max_connections,
+            quantizer=quantizer
+        )
+
+    def update_config(self) -> Any:
+        """
+        Returns the changes of the mutable parameters for an existing collection.
+        """
+        quantizer = None
+        if self.quantizer == "pq":
+            quantizer = Reconfigure.VectorIndex.Quantizer.pq(
+                segments=self.pq_segments,
+                training_limit=self.pq_training_limit
+            )
+        elif self.quantizer == "bq":
+            quantizer = Reconfigure.VectorIndex.Quantizer.bq(rescore_limit=self.rescore_limit)
+
+        return Reconfigure.VectorIndex.hnsw(ef=self.ef, quantizer=quantizer)
+
+    def differences(self, config: Any) -> Dict[str, Tuple[Any, Any, bool]]:
+        """
+        Compares the settings with the vector index configuration of an existing
+        collection (`collection.config.get().vector_index_config`).
+
+        Returns:
+            Dict[str, Tuple[Any, Any, bool]]: current value, wanted value and whether it
+                can be updated in place, for every set parameter that differs
+        """
+        current_quantizer = _quantizer_name(config.quantizer)
+        current = {
+            "ef": (config.ef, True),
+            "ef_construction": (config.ef_construction, False),
+            "max_connections": (config.max_connections, False),
+            # compression can be turned on later but not switched or turned off
+            "quantizer": (current_quantizer, current_quantizer == "none" and self.quantizer != "none"),
+            "rescore_limit": (getattr(config.quantizer, "rescore_limit", None), current_quantizer in ["none", "bq"]),
+            "pq_segments": (getattr(config.quantizer, "segments", None), current_quantizer == "none"),
+            "pq_training_limit": (getattr(config.quantizer, "training_limit", None), current_quantizer == "none")
+        }
+
+        if self.quantizer != "bq":
+            current.pop("rescore_limit")
+        if self.quantizer != "pq":
+            current.pop("pq_segments")
+            current.pop("pq_training_limit")
+
+        differences = {}
+        for name, wanted in self.as_dict().items():
+            if name in current and current[name][0] != wanted:
+                differences[name] = (current[name][0], wanted, current[name][1])
+
+        return differences
+
+def _warn_index_differences(collection_name: str, settings: VectorIndexSettings, config: Any) -> None:
+    # collections with named vectors keep their index configuration per vector
+    differences = settings.differences(config) if config is not None else {}
+    if differences:
+        changes = ", ".join(f"{name}: {current} -> {wanted}" for name, (current, wanted, _) in differences.items())
+        logger.warning(f"{collection_name} vector index differs from the configured settings ({changes}). "
+                       f"Run `python -m src.migrate_collection` to apply them.")
+
+def _join_article_chunks(chunks: List[Dict[str, Any]]) -> str:
+    ordered_chunks = sorted(chunks, key=lambda x: x['order_id'])
+    return "\n".join([chunk['chunk_body'] for chunk in ordered_chunks])
+
+def _article_filter(properties: Dict[str, Any]) -> Filter:
+    return (
+        Filter.by_property("document").equal(properties["document"]) &
+        Filter.by_property("chapter").equal(properties["chapter"]) &
+        Filter.by_property("article").equal(properties["article"])
+    )
+
+class DatabaseManager(StorageBackend):
+
+    def __init__(self, embedding_host: str, embedding_cache: Optional[EmbeddingCache] = None,
+                 build_index: bool = False, collection_name: str = "LawDocuments",
+                 index_settings: Optional[VectorIndexSettings] = None) -> None:
+        super().__init__(embedding_host, embedding_cache)
+        self.collection_name = collection_name
+        self.index_settings = index_settings or VectorIndexSettings.from_env()
 
         self.client = weaviate.connect_to_local()
         self.collection = self.client.collections.get(self.collection_name)
 
         logger.info(f"Database connection established: {self.collection_name}")
         
-        self.embedding_url = f"http://{embedding_host}/embed"
-        
-        test_response = self.encode(["test"])
-        if test_response[0]:
-            logger.info(f"Sentence Embedding model is available for use.")
-            logger.info(f"Embed dimensions: {len(test_response[0])}")
-        else:
-            logger.info(f"EMBEDDING SERVER IS NOT CONNECTED! FIX IT BEFORE FURTHER USE.")
-            import sys
-            sys.exit()
+        self.check_embedder()
 
         if not self.collection.exists():
             logger.info(f"COLLECTION {self.collection_name} DOESN'T EXIST. CREATING A NEW ONE...")
             self.collection = self.client.collections.create(
                 name=self.collection_name,
-                properties=[
-                    Property(name="order_id", data_type=DataType.INT),
-                    Property(name="document", data_type=DataType.TEXT),
-                    Property(name="chapter", data_type=DataType.TEXT),
-                    Property(name="article", data_type=DataType.TEXT),
-                    Property(name="chunk_body", data_type=DataType.TEXT)
-                ]
+                properties=LAW_DOCUMENT_PROPERTIES,
+                vector_index_config=self.index_settings.create_config()
             )
+        else:
+            config = self.collection.config.get()
+            property_names = {prop.name for prop in config.properties}
+            if "content_hash" not in property_names:
+                logger.info(f"ADDING content_hash PROPERTY TO {self.collection_name}...")
+                self.collection.config.add_property(LAW_DOCUMENT_PROPERTIES[-1])
+            _warn_index_differences(self.collection_name, self.index_settings, config.vector_index_config)
 
-    def encode(self, sentences: List[str]) -> List[List[int]]:
-        headers = {"Content-Type": "application/json"}
-        
-        payload = {"inputs": sentences}
+        if build_index:
+            self.build_index()
 
-        response = requests.post(
-            self.embedding_url,
-            headers=headers,
-            json=payload
-        )
+    def close(self) -> None:
+        self.client.close()
+        self.embedding_cache.close()
+        if self.answer_cache is not None:
+            self.answer_cache.close()
 
-        return response.json()
+    def build_index(self) -> ArticleIndex:
+        """
+        Loads every chunk of the collection into the in-memory article index
+        used for context expansion in `read`.
+        """
+        index = ArticleIndex()
+        index.add(obj.properties for obj in self.collection.iterator())
 
-    def insert(self, chunks: List[Dict[str, str]]) -> List[str]:
+        self.article_index = index
+        log_index_footprint(index)
 
-        print(f"Chunks received for insertion={len(chunks)}")
+        return index
 
-        vectors = []
-        for chunk in chunks:
-            text_vector = self.encode([chunk["chunk_body"]])[0]
-            vectors.append(text_vector)
+    def insert(self, chunks: List[Dict[str, str]], 
+               embed_batch_size: int = EMBED_BATCH_SIZE,
+               max_in_flight: int = EMBED_MAX_IN_FLIGHT) -> List[str]:
 
-        print(f"LEN VECTORS RETURNED: {len(vectors)}")
+        print(f"Chunks received for insertion={len(chunks)}")
 
         uuids = []
+        inserted = {}
+        start_time = time.perf_counter()
 
         try:
             with self.collection.batch.fixed_size(batch_size=50) as batch:
-                for i, chunk in enumerate(chunks):
-                    uuid = batch.add_object(
-                        properties={
-                            "order_id": chunk["order_id"],
-                            "document": chunk["document"],
-                            "chapter": chunk["chapter"],
-                            "article": chunk["article"],
-                            "chunk_body": chunk["chunk_body"]
-                        },
-                        vector=vectors[i]
-                    )
-                    uuids.append(str(uuid))
+                for chunk_batch, vectors in self._embed_batches(chunks, embed_batch_size, max_in_flight):
+                    for chunk, vector in zip(chunk_batch, vectors):
+                        properties = chunk_properties(chunk)
+                        uuid = batch.add_object(
+                            properties=properties,
+                            uuid=chunk_uuid(chunk),
+                            vector=vector
+                        )
+                        uuids.append(str(uuid))
+                        inserted[str(uuid)] = properties
                     if batch.number_errors > 10:
                         print("Batch import stopped due to excessive errors.")
                         break
@@ -116,55 +312,103 @@ class DatabaseManager:
             if failed_objects:
                 print(f"Number of failed imports: {len(failed_objects)}")
                 print(f"First failed object: {failed_objects[0]}")
+                for failed_object in failed_objects:
+                    inserted.pop(str(failed_object.object_.uuid), None)
 
         except Exception as err:
             print(f"Exception occured in insertion:\n{str(err)}")
             return []
 
+        if self.article_index is not None:
+            self.article_index.add(inserted.values())
+        # cached agent answers citing a rewritten article are stale now
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_articles(ArticleIndex.key_of(properties) for properties in inserted.values())
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Inserted {len(uuids)} chunks in {elapsed:.2f}s ({len(uuids) / max(elapsed, 1e-9):.1f} chunks/sec)")
+
         return uuids
     
-    def read(self, query: str, limit: int = 2) -> List[str]:
+    def read(self, query: str, limit: int = 2, alpha: Optional[float] = None) -> List[str]:
+        """
+        Searches the collection for the query and returns the full articles of the hits.
+        Args:
+            query (str): user query to search for
+            limit (int): number of hits to return
+            alpha (Optional[float]): when given, runs a hybrid search fusing BM25 over
+                the chunk bodies and article names with the vector score, where 1.0
+                is pure vector search and 0.0 is pure keyword search
         
-        query_vector = self.encode([query])[0]
+        Returns:
+            List[str]: article texts of the hits
+        """
         
-        response = self.collection.query.near_vector(
-            near_vector=query_vector,
-            limit=limit,
-            return_metadata=MetadataQuery(distance=True)
-        )
-
-        response_objects = []
+        with telemetry.span("db.encode"):
+            query_vector = self.encode([query])[0]
+        
+        if alpha is None:
+            with telemetry.span("db.near_vector", limit=limit):
+                response = self.collection.query.near_vector(
+                    near_vector=query_vector,
+                    limit=limit,
+                    return_metadata=MetadataQuery(distance=True)
+                )
+        else:
+            with telemetry.span("db.hybrid", limit=limit, alpha=alpha):
+                response = self.collection.query.hybrid(
+                    query=query,
+                    vector=query_vector,
+                    alpha=alpha,
+                    query_properties=HYBRID_QUERY_PROPERTIES,
+                    fusion_type=HybridFusion.RELATIVE_SCORE,
+                    limit=limit,
+                    return_metadata=MetadataQuery(score=True)
+                )
 
+        final_response = []
         for obj in response.objects:
-            
+            final_response.append(self._expand_context(obj.properties))
+
+        return final_response
+
+    def _expand_context(self, properties: Dict[str, Any]) -> str:
+        """
+        Returns the whole article of a hit, from the article index when it holds
+        the hit's chunk and otherwise (an article it hasn't seen, or one changed
+        by an ingestion elsewhere) from the database.
+        """
+        key = ArticleIndex.key_of(properties)
+        if self.article_index is not None and self.article_index.has_chunk(properties):
+            telemetry.increment("db_expansions_total", help_text="Context expansions by source.", source="index")
+            return self.article_index.get(key)
+
+        telemetry.increment("db_expansions_total", help_text="Context expansions by source.", source="fetch")
+        with telemetry.span("db.fetch_objects"):
             context_response = self.collection.query.fetch_objects(
-                filters=(
-                    Filter.by_property("document").equal(obj.properties["document"]) &
-                    Filter.by_property("chapter").equal(obj.properties["chapter"]) &
-                    Filter.by_property("article").equal(obj.properties["article"])
-                ),
-                limit=4
+                filters=_article_filter(properties),
+                limit=MAX_ARTICLE_CHUNKS
             )
 
-            objects = []
-            for context_obj in context_response.objects:
-                objects.append(context_obj.properties)
-
-            response_objects.append(objects)
+        objects = []
+        for context_obj in context_response.objects:
+            objects.append(context_obj.properties)
 
-        final_response = []
-        for unordered_chunks in response_objects:
-            ordered_chunks = sorted(unordered_chunks, key=lambda x: x['order_id'])
-            res = "\n".join([chunk['chunk_body'] for chunk in ordered_chunks])
-            final_response.append(res)
+        if self.article_index is not None:
+            self.article_index.discard(key)
+            self.article_index.add(objects)
 
-        return final_response
+        return _join_article_chunks(objects)
     
     def delete(self, title: str = None) -> Dict[str, int]:
         try:
             deleted = self.collection.data.delete_many(
                 where=Filter.by_property("document").like(title)
             )
+            if self.article_index is not None:
+                self.article_index.remove_document(title)
+            if self.answer_cache is not None:
+                self.answer_cache.invalidate_documents(title)
             return {
                 "failed": deleted.failed,
                 "successful": deleted.successful,
@@ -175,9 +419,331 @@ class DatabaseManager:
             print(f"There appeared error deleting objects: {str(err)}")
             return { }
         
+    def stored_chunks(self, documents: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        documents = set(documents)
+        if not documents:
+            return {}
+
+        document_filter = Filter.any_of([Filter.by_property("document").equal(document) for document in documents])
+        matches = self.collection.aggregate.over_all(filters=document_filter, total_count=True).total_count
+
+        if matches <= QUERY_MAXIMUM_RESULTS:
+            objects = self.collection.query.fetch_objects(
+                filters=document_filter,
+                return_properties=STORED_CHUNK_PROPERTIES,
+                limit=max(matches, 1)
+            ).objects
+        else:
+            # filtered queries cannot reach past QUERY_MAXIMUM_RESULTS, the cursor pages through everything
+            objects = self.collection.iterator(return_properties=STORED_CHUNK_PROPERTIES)
+
+        stored = {}
+        for obj in objects:
+            # text filters match on tokens, so keep the exact documents only
+            if obj.properties["document"] in documents:
+                stored[str(obj.uuid)] = obj.properties
+
+        return stored
+
+    def delete_ids(self, ids: List[str]) -> int:
+        deleted = self.collection.data.delete_many(
+            where=Filter.by_id().contains_any(ids)
+        )
+        return deleted.successful
+
     def count(self) -> int:
         try:
             count = self.collection.aggregate.over_all(total_count=True)
             return count.total_count
         except WeaviateQueryError as e:
-            print(f"Counting error: {str(e)}")
\ No newline at end of file
+            print(f"Counting error: {str(e)}")
+            
+class AsyncDatabaseManager:
+    """
+    Asynchronous counterpart of DatabaseManager built on Weaviate's async client
+    and a pooled httpx client for /embed, so that the MCP server can serve
+    concurrent tool calls without blocking its event loop. Call `connect` before use,
+    and `build_index` to expand the context of search hits from memory.
+    """
+
+    def __init__(self, embedding_host: str, max_connections: int = 20,
+                 embedding_cache: Optional[EmbeddingCache] = None,
+                 collection_name: str = "LawDocuments",
+                 index_settings: Optional[VectorIndexSettings] = None,
+                 index_check_interval: float = ARTICLE_INDEX_CHECK_INTERVAL) -> None:
+        self.collection_name = collection_name
+        self.index_settings = index_settings or VectorIndexSettings.from_env()
+        self.embedding_url = f"http://{embedding_host}/embed"
+        self.embedding_cache = embedding_cache or EmbeddingCache.from_env()
+
+        self.client = weaviate.use_async_with_local()
+        self.collection = None
+        self.article_index: Optional[ArticleIndex] = None
+        self.answer_cache: Optional[AnswerCache] = AnswerCache.from_env()
+        self.startup_timings: Dict[str, float] = {}
+
+        self.index_check_interval = index_check_interval
+        self._index_checked_at = 0.0
+        self._index_check: Optional[asyncio.Task] = None
+
+        # keep-alive connections are reused across /embed calls
+        self.http_client = httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=httpx.Timeout(30.0)
+        )
+
+    async def connect(self) -> None:
+        """
+        Connects to Weaviate and probes the /embed server concurrently, recording
+        the duration of each in `startup_timings`. Raises the error of the first
+        dependency that is not reachable, so that the caller can retry; the
+        article index is loaded separately by `build_index`.
+        """
+        async def connect_database() -> None:
+            start_time = time.perf_counter()
+            if not self.client.is_connected():
+                await self.client.connect()
+
+            collection = self.client.collections.get(self.collection_name)
+            if not await collection.exists():
+                logger.info(f"COLLECTION {self.collection_name} DOESN'T EXIST. CREATING A NEW ONE...")
+                collection = await self.client.collections.create(
+                    name=self.collection_name,
+                    properties=LAW_DOCUMENT_PROPERTIES,
+                    vector_index_config=self.index_settings.create_config()
+                )
+            else:
+                config = await collection.config.get()
+                _warn_index_differences(self.collection_name, self.index_settings, config.vector_index_config)
+
+            self.collection = collection
+            self.startup_timings["weaviate"] = time.perf_counter() - start_time
+            logger.info(f"Database connection established: {self.collection_name}")
+
+        async def probe_embedder() -> None:
+            start_time = time.perf_counter()
+            test_response = await self.encode(["test"], use_cache=False)
+            if not (isinstance(test_response, list) and test_response and test_response[0]):
+                raise ConnectionError("EMBEDDING SERVER IS NOT CONNECTED! FIX IT BEFORE FURTHER USE.")
+
+            self.startup_timings["embedder"] = time.perf_counter() - start_time
+            logger.info(f"Sentence Embedding model is available for use.")
+            logger.info(f"Embed dimensions: {len(test_response[0])}")
+
+        results = await asyncio.gather(connect_database(), probe_embedder(), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def build_index(self) -> ArticleIndex:
+        """
+        Loads every chunk of the collection into the in-memory article index
+        used for context expansion in `read`.
+        """
+        index = ArticleIndex()
+        async for obj in self.collection.iterator():
+            index.add([obj.properties])
+
+        self.article_index = index
+        self._index_checked_at = time.monotonic()
+        log_index_footprint(index)
+
+        return index
+
+    def _check_index(self) -> None:
+        """
+        Rebuilds the article index in the background when the number of stored
+        chunks no longer matches it, at most once every `index_check_interval`
+        seconds. Chunks ingested or deleted by another process are caught this
+        way, while `_expand_context` refetches the articles whose hit it lacks.
+        """
+        if self.article_index is None or time.monotonic() - self._index_checked_at < self.index_check_interval:
+            return
+        if self._index_check is not None and not self._index_check.done():
+            return
+
+        self._index_checked_at = time.monotonic()
+        self._index_check = asyncio.create_task(self._refresh_index(), name="article-index-check")
+
+    async def _refresh_index(self) -> None:
+        try:
+            stored = await self.count()
+            if stored is None or stored == self.article_index.chunk_count():
+                return
+
+            logger.info(f"Article index holds {self.article_index.chunk_count()} of {stored} stored chunks, rebuilding it")
+            await self.build_index()
+        except Exception as err:
+            logger.warning(f"Article index check failed: {err!r}")
+
+    async def close(self) -> None:
+        if self._index_check is not None:
+            self._index_check.cancel()
+        await self.http_client.aclose()
+        await self.client.close()
+        self.embedding_cache.close()
+        if self.answer_cache is not None:
+            self.answer_cache.close()
+
+    async def encode(self, sentences: List[str], use_cache: bool = True) -> List[List[int]]:
+        if not use_cache:
+            return await self._request_embeddings(sentences)
+
+        vectors = await self._run_cache(lambda: [self.embedding_cache.get(sentence) for sentence in sentences])
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            response = await self._request_embeddings([sentences[i] for i in missing])
+            if not isinstance(response, list):
+                return response
+
+            for i, vector in zip(missing, response):
+                vectors[i] = vector
+            await self._run_cache(lambda: [self.embedding_cache.put(sentences[i], vectors[i]) for i in missing])
+
+        return vectors
+
+    async def _run_cache(self, function: Callable[[], Any]) -> Any:
+        # the SQLite tier blocks on disk, so it is kept off the event loop
+        if self.embedding_cache.path:
+            return await asyncio.to_thread(function)
+        return function()
+
+    async def _request_embeddings(self, sentences: List[str]) -> List[List[int]]:
+        response = await self.http_client.post(
+            self.embedding_url,
+            json={"inputs": sentences}
+        )
+
+        return response.json()
+
+    async def insert(self, chunks: List[Dict[str, str]],
+                     embed_batch_size: int = EMBED_BATCH_SIZE,
+                     max_in_flight: int = EMBED_MAX_IN_FLIGHT) -> List[str]:
+        """
+        Embeds and writes the chunks in batches. Each batch is written as soon as
+        its embeddings arrive, while the next ones are being embedded, with at
+        most `max_in_flight` batches between the /embed request and the write.
+        """
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def insert_batch(batch: List[Dict[str, str]]) -> List[DataObject]:
+            async with semaphore:
+                vectors = await self.encode([chunk["chunk_body"] for chunk in batch], use_cache=False)
+
+                objects = [
+                    DataObject(properties=chunk_properties(chunk), uuid=chunk_uuid(chunk), vector=vector)
+                    for chunk, vector in zip(batch, vectors)
+                ]
+                response = await self.collection.data.insert_many(objects)
+
+            if response.has_errors:
+                print(f"Number of failed imports: {len(response.errors)}")
+
+            inserted = [objects[i] for i in response.uuids]
+            if self.article_index is not None:
+                self.article_index.add(obj.properties for obj in inserted)
+            if self.answer_cache is not None:
+                await asyncio.to_thread(
+                    self.answer_cache.invalidate_articles, [ArticleIndex.key_of(obj.properties) for obj in inserted]
+                )
+
+            return inserted
+
+        batches = [chunks[i:i+embed_batch_size] for i in range(0, len(chunks), embed_batch_size)]
+        start_time = time.perf_counter()
+
+        results = await asyncio.gather(*(insert_batch(batch) for batch in batches), return_exceptions=True)
+
+        uuids = []
+        for result in results:
+            if isinstance(result, BaseException):
+                print(f"Exception occured in insertion:\n{str(result)}")
+                continue
+            uuids.extend(str(obj.uuid) for obj in result)
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Inserted {len(uuids)} chunks in {elapsed:.2f}s ({len(uuids) / max(elapsed, 1e-9):.1f} chunks/sec)")
+
+        return uuids
+
+    async def read(self, query: str, limit: int = 2, alpha: Optional[float] = None) -> List[str]:
+        self._check_index()
+
+        with telemetry.span("db.encode"):
+            query_vector = (await self.encode([query]))[0]
+
+        if alpha is None:
+            with telemetry.span("db.near_vector", limit=limit):
+                response = await self.collection.query.near_vector(
+                    near_vector=query_vector,
+                    limit=limit,
+                    return_metadata=MetadataQuery(distance=True)
+                )
+        else:
+            with telemetry.span("db.hybrid", limit=limit, alpha=alpha):
+                response = await self.collection.query.hybrid(
+                    query=query,
+                    vector=query_vector,
+                    alpha=alpha,
+                    query_properties=HYBRID_QUERY_PROPERTIES,
+                    fusion_type=HybridFusion.RELATIVE_SCORE,
+                    limit=limit,
+                    return_metadata=MetadataQuery(score=True)
+                )
+
+        # hits missing from the article index are expanded concurrently
+        return list(await asyncio.gather(*(
+            self._expand_context(obj.properties) for obj in response.objects
+        )))
+
+    async def _expand_context(self, properties: Dict[str, Any]) -> str:
+        key = ArticleIndex.key_of(properties)
+        if self.article_index is not None and self.article_index.has_chunk(properties):
+            telemetry.increment("db_expansions_total", help_text="Context expansions by source.", source="index")
+            return self.article_index.get(key)
+
+        telemetry.increment("db_expansions_total", help_text="Context expansions by source.", source="fetch")
+        with telemetry.span("db.fetch_objects"):
+            context_response = await self.collection.query.fetch_objects(
+                filters=_article_filter(properties),
+                limit=MAX_ARTICLE_CHUNKS
+            )
+
+        objects = [context_obj.properties for context_obj in context_response.objects]
+
+        if self.article_index is not None:
+            self.article_index.discard(key)
+            self.article_index.add(objects)
+
+        return _join_article_chunks(objects)
+
+    async def delete(self, title: str = None) -> Dict[str, int]:
+        try:
+            deleted = await self.collection.data.delete_many(
+                where=Filter.by_property("document").like(title)
+            )
+            if self.article_index is not None:
+                self.article_index.remove_document(title)
+            if self.answer_cache is not None:
+                await asyncio.to_thread(self.answer_cache.invalidate_documents, title)
+            return {
+                "failed": deleted.failed,
+                "successful": deleted.successful,
+                "matched": deleted.matches
+            }
+
+        except Exception as err:
+            print(f"There appeared error deleting objects: {str(err)}")
+            return { }
+
+    async def count(self) -> int:
+        try:
+            count = await self.collection.aggregate.over_all(total_count=True)
+            return count.total_count
+        except WeaviateQueryError as e:
+            print(f"Counting error: {str(e)}")
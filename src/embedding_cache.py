@@ -0,0 +1,144 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import re
+import array
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+class EmbeddingCache:
+    """
+    Two-tier cache of sentence embeddings keyed on the normalized text and the
+    embedding model identity. The first tier is a bounded in-process LRU and
+    the optional second tier is a SQLite file that survives server restarts.
+    """
+
+    def __init__(self, model_id: str, max_size: int = 4096, path: Optional[str] = None) -> None:
+        self.model_id = model_id
+        self.max_size = max_size
+        self.path = path
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._memory: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+
+        if path:
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._disk.commit()
+            logger.info(f"Persistent embedding cache opened: {path}")
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        """
+        Builds the cache from EMBEDDING_MODEL, EMBEDDING_CACHE_SIZE and
+        EMBEDDING_CACHE_PATH (the disk tier is disabled when the path is unset).
+        """
+        return cls(
+            model_id=os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3"),
+            max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+            path=os.getenv("EMBEDDING_CACHE_PATH") or None
+        )
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = unicodedata.normalize("NFKC", text).casefold()
+        return re.sub(r"\s+", " ", text).strip()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\x00{self.normalize(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    vector = array.array("f", row[0]).tolist()
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector: List[float]) -> None:
+        key = self.key(text)
+
+        with self._lock:
+            self._remember(key, vector)
+
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, array.array("f", vector).tobytes())
+                )
+                self._disk.commit()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._memory)
+        }
+
+    def close(self) -> None:
+        logger.info(f"Embedding cache stats: {self.stats()}")
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
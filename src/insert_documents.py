@@ -1,20 +1,124 @@
-from src.database_management import DatabaseManager
+import os
+import sys
+import glob
+import time
+import argparse
+
+from typing import List, Dict, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# the script is run as `python src/insert_documents.py`, so the repository
+# root has to be importable for the `src.` and `utils.` package imports
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY_ROOT)
+
+from src.storage_backend import create_backend, EMBED_BATCH_SIZE, EMBED_MAX_IN_FLIGHT
 from utils.document_management import DocumentManager
 
-import os
 from dotenv import load_dotenv
 load_dotenv()
 
+def document_key(filepath: str) -> str:
+    """
+    Name a document is stored under: its path relative to DOCUMENTS_ROOT (the
+    repository root by default), so that the chunk ids do not depend on the
+    working directory or on how the path was written on the command line.
+    """
+    root = os.path.realpath(os.getenv("DOCUMENTS_ROOT") or REPOSITORY_ROOT)
+    return os.path.relpath(os.path.realpath(filepath), root)
+
+def collect_paths(targets: List[str]) -> List[str]:
+    """
+    Expands directories (searched recursively for .docx files) and glob
+    patterns into a sorted list of unique document paths.
+    """
+    paths = set()
+    for target in targets:
+        if os.path.isdir(target):
+            matches = glob.glob(os.path.join(target, "**", "*.docx"), recursive=True)
+        else:
+            matches = glob.glob(target)
+        paths.update(os.path.realpath(match) for match in matches)
+
+    return sorted(paths)
+
+def parse_document(filepath: str, chunk_size: int) -> Tuple[str, List[Dict[str, Any]], float]:
+    start_time = time.perf_counter()
+
+    articles = DocumentManager.iter_articles(filepath, document_key(filepath))
+    chunks = DocumentManager.chunk_articles(articles, chunk_size)
+
+    return document_key(filepath), chunks, time.perf_counter() - start_time
+
 if __name__ == '__main__':
 
-    filepath = "docs/ХҮНИЙ ХУВИЙН МЭДЭЭЛЭЛ ХАМГААЛАХ ТУХАЙ.docx"
+    parser = argparse.ArgumentParser(description="Ingests legal .docx documents into the vector database.")
+    parser.add_argument("targets", nargs="*", default=["docs"],
+                        help="directories or glob patterns of .docx files (default: docs)")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of parsing processes")
+    parser.add_argument("--flush-size", type=int, default=256,
+                        help="number of parsed chunks gathered before they are ingested together")
+    parser.add_argument("--embed-batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--max-in-flight", type=int, default=EMBED_MAX_IN_FLIGHT)
+    args = parser.parse_args()
+
+    filepaths = collect_paths(args.targets)
+    if not filepaths:
+        print(f"No documents found in: {args.targets}")
+        sys.exit(1)
+
+    print(f"Documents found for ingestion={len(filepaths)}")
+
+    dbms = create_backend(os.getenv("EMBEDDING_SERVER"))
+
+    totals = {"unchanged": 0, "upserted": 0, "deleted": 0}
+    pending_chunks = []
+    failed_files = []
+
+    def flush() -> None:
+        if not pending_chunks:
+            return
+
+        flush_start = time.perf_counter()
+        summary = dbms.ingest(pending_chunks, args.embed_batch_size, args.max_in_flight)
+        flush_elapsed = time.perf_counter() - flush_start
+        print(f"Ingested {len(pending_chunks)} chunks in {flush_elapsed:.2f}s "
+              f"({len(pending_chunks) / max(flush_elapsed, 1e-9):.1f} chunks/sec embedded and stored): {summary}")
+
+        for key in totals:
+            totals[key] += summary[key]
+        pending_chunks.clear()
+
+    start_time = time.perf_counter()
+
+    # documents are parsed in worker processes while the main process keeps
+    # feeding the parsed chunks into the shared embed/insert stage
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(parse_document, filepath, args.chunk_size): filepath for filepath in filepaths}
+
+        for future in as_completed(futures):
+            try:
+                filepath, chunks, elapsed = future.result()
+            except Exception as err:
+                print(f"Failed to parse {futures[future]}: {str(err)}")
+                failed_files.append(futures[future])
+                continue
+
+            print(f"Parsed {filepath}: {len(chunks)} chunks, parse time {elapsed:.2f}s")
+
+            pending_chunks.extend(chunks)
+            if len(pending_chunks) >= args.flush_size:
+                flush()
+
+    flush()
 
-    articles = DocumentManager.segment_document(filepath)
-    chunks = DocumentManager.chunk_articles(articles, 800)
-    
-    dbms = DatabaseManager(os.getenv("EMBEDDING_SERVER"))
+    elapsed = time.perf_counter() - start_time
+    total_chunks = sum(totals.values()) - totals["deleted"]
 
-    ids = dbms.insert(chunks)
-    print(f"Inserted documents: {ids}")
+    print(f"Ingested {len(filepaths) - len(failed_files)}/{len(filepaths)} documents in {elapsed:.2f}s: {totals}")
+    print(f"Throughput: {total_chunks / max(elapsed, 1e-9):.1f} chunks/sec, "
+          f"{(len(filepaths) - len(failed_files)) / max(elapsed, 1e-9):.2f} documents/sec")
 
-    dbms.client.close()
\ No newline at end of file
+    dbms.close()
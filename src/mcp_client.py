@@ -22,23 +22,61 @@
 
 import sys
 import json
+import time
+import asyncio
 import logging
 
 from jinja2 import Template
-from typing import List, Dict, Optional
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Set, Tuple
+from langchain_core.tools import BaseTool, ToolException
 from langchain_mcp_adapters.client import MultiServerMCPClient
-from utils.model_management import setup_client, generate_message
+from src.mcp_sessions import ServerSession
+from src.speculation import Prefetch, SpeculativeRetriever
+from src.tool_cache import ToolResultCache
+from src.answer_cache import AnswerCache, QueryEmbedder
+from src.context_manager import ContextManager
+from src.model_router import ModelRouter
+from src.article_index import ArticleKey, parse_article_keys
+from utils.telemetry import telemetry, SPAN_KIND_CLIENT
+from utils.model_management import (setup_client, generate_message, RequestScheduler,
+                                    PRIORITY_FINAL, PRIORITY_INTERMEDIATE, PRIORITY_FIRST)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
+def _set_first_token(stats: Dict[str, Any], call_start: float) -> None:
+    # generate_message times the first token from its own start, kept here as a clock reading
+    first_token = stats.get("timings", {}).get("first_token")
+    if first_token is not None:
+        stats["first_token_at"] = call_start + first_token
+
 class StdioClient:
 
-    def __init__(self, model_name: str, api_key: str):
+    def __init__(self, model_name: str, api_key: str, speculative_retrieval: bool = False,
+                 speculation_threshold: float = 0.5, tool_timeout: float = 30.0,
+                 tool_cache: Optional[ToolResultCache] = None,
+                 answer_cache: Optional[AnswerCache] = None, embedder: Optional[QueryEmbedder] = None,
+                 context_manager: Optional[ContextManager] = None, router: Optional[ModelRouter] = None,
+                 scheduler: Optional[RequestScheduler] = None):
         self.client: Optional[MultiServerMCPClient] = None
+        self.sessions: Dict[str, ServerSession] = {}
+        self.available_tools: List[BaseTool] = []
+        self.tool_servers: Dict[str, str] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self.tool_timeout = tool_timeout
+        self.tool_cache = tool_cache if tool_cache is not None else ToolResultCache()
+        self.answer_cache = answer_cache
+        self.context_manager = context_manager if context_manager is not None else ContextManager()
+        self.embedder = embedder
+        self.speculator: Optional[SpeculativeRetriever] = None
+        if speculative_retrieval:
+            self.speculator = SpeculativeRetriever(self.call_tool, threshold=speculation_threshold)
         self.model_client = setup_client(api_key)
         self.model_name = model_name
-        self.system = """
+        self.router = router if router is not None else ModelRouter(model_name)
+        self.scheduler = scheduler
+        self.startup_timings: Dict[str, Optional[float]] = {}
+        self.system_template = """
 You are a legal AI agent responsible for rigorous interpretation and search the vector database for Mongolian legal articles to the user query given further down. You function according to ReAct (i.e. Reason and Act) principle, in which you first think regarding the user query, act by choosing a tool in your arsenal and observe the response resulting from the tool until you formed your final response.
 
 Now you're strictly constrained to following the protocol detailed from here on:
@@ -47,7 +85,7 @@ Step 1. Language Constraints: Your `rationale` should be in English since you or
 
 Step 2. Because you're a legal agent users consult you must respond to the questions not related to law and regulations by stating you cannot help them with their request and suggest the user to ask something in legal subjects.
 
-Step 3. If user query even slightly pertains to "Private Data Protection" (i.e. Хувь хүний мэдээлэл хамгаалах тухай хууль in Mongolian), then you must search the vector database for better context to form your final response. You must assume every user query is implicitly related to Mongolian legal frameworks.
+Step 3. If user query even slightly pertains to "Private Data Protection" (i.e. Хувь хүний мэдээлэл хамгаалах тухай хууль in Mongolian), then you must search the vector database for better context to form your final response. You must assume every user query is implicitly related to Mongolian legal frameworks. If the user query names an exact article number (e.g. "8.8", "12 дугаар зүйл") or a law title, also pass "alpha": 0.5 in the vector database search arguments so that the exact words are matched in the same search.
 
 Step 4. If user query is a legal question that is not even remotely related to  "Private Data Protection", then you must search the web for the answer.
 
@@ -55,7 +93,7 @@ Step 5. In your output, depending on the context you have and the user query, yo
 
         (Option 2.4.a)  answer: If the response to the query is satisfied by the recent tool response, then just answer directly. It also includes the scenario where user asked an irrelevant question as stated in Step 2. Assume this is the indicator that your actions are finalized. Set "tool": "answer" in your output JSON.
 
-        (Option 2.4.b)  tool: Or if you need to invoke a tool at your disposal, set "tool": "answer" in your output JSON. In case of tool calling you had better first consult your conversational context before executing a function, as it might put you in an indefinite loop. Keep this in mind because it's probably the most important step that could hinder your efficiency. For example, you might already possess answer to the user query already in your earlier tool use. But, you may get past it without inspection, resulting in a different call of the same tool.
+        (Option 2.4.b)  tool: Or if you need to invoke a tool at your disposal, set "tool": "answer" in your output JSON. In case of tool calling you had better first consult your conversational context before executing a function, as it might put you in an indefinite loop. Keep this in mind because it's probably the most important step that could hinder your efficiency. For example, you might already possess answer to the user query already in your earlier tool use. But, you may get past it without inspection, resulting in a different call of the same tool. When a step needs several independent tools, for example the vector database and the web search, list all of them in `tools`: they are run at the same time and all of their responses are returned before your next step.
 
 In case of tool invocation, the following list of tools should give enough background to contextualize you in available functions/tools you're able to carry out or request.
 <tools>
@@ -69,18 +107,20 @@ Input Schema: {{ tool.inputSchema }}
 Step 6. Search the web if the retrieved documents from the vector database contains a legal reference to other law documents and you need it for understanding the full context, then make your next tool call as searching the web before forming your final response. For example, for user query "Хувь хүний мэдээллийг хамгаалах хуулийг гэмт хэргийн шинжтэй зөрчсөн бол яах вэ?" the database document says: "Гэмт хэргийн шинжтэй Хувь хүний мэдээллийг хамгаалах хуулийг зөрчсөн бол Зөрчлийн хуулиар шийтгэнэ.". Here, the penalty for the legal infringement refers to "Зөрчлийн хууль" which is unclear as to how criminal use of the private data is punished. So, you had best search the web for "Хувь хүний мэдээлэл хамгаалах хуулийг гэмт хэргийн шинжтэй зөрчсөн Зөрчлийн хуулийн шийтгэл". Then find out that it fines the person with "500 monetary units". Now it's clear to form the final response to the user.
 
 You are permitted to generate a JSON-only response, anything else is absolutely forbidden.
-You are allowed to produce a JSON object with no code fences, explanations, or trailing commas included. Your output must be composed of the following keys:
+You are allowed to produce a JSON object with no code fences, explanations, or trailing commas included. Your output must be composed of the following keys, in this order:
 {
     "rationale": "Brief justification for your next action in English, explicitly referring to the context and or tools used.",
     "decision": "answer" or "tool",
-    "message_to_user": "If `decision` is set to `tool`, meaning you're calling a tool, then use non-technical language to describe what you're doing. For example 'Биометрик датаг хадгалах тухай өгөгдлийн сангаас хайж байна' or 'Биометрик дата хадгалалтыг Иргэний хуулийн 3.1-р зүйлээр зохицуулдаг юм байна. Иргэний хуулийн 3.1-р зүйлийг интернетээс хайж байна'. Otherwise, where `decision` is set to `answer`, it is your finalized response collecting all the context needed for answering the query. Keep it as long as you feel necessary, but do not overbloat it with unnecessary texts. Do not disclose anything private such as tool names or arguments here.",
-    "tool": {
-        "name": <tool_name chosen>,
-        "args": {
-            "<argument1>": <value1>,
-            "<argument2>": <value2>
+    "tools": [
+        {
+            "name": <tool_name chosen>,
+            "args": {
+                "<argument1>": <value1>,
+                "<argument2>": <value2>
+            }
         }
-    }
+    ],
+    "message_to_user": "If `decision` is set to `tool`, meaning you're calling a tool, then use non-technical language to describe what you're doing. For example 'Биометрик датаг хадгалах тухай өгөгдлийн сангаас хайж байна' or 'Биометрик дата хадгалалтыг Иргэний хуулийн 3.1-р зүйлээр зохицуулдаг юм байна. Иргэний хуулийн 3.1-р зүйлийг интернетээс хайж байна'. Otherwise, where `decision` is set to `answer`, it is your finalized response collecting all the context needed for answering the query. Keep it as long as you feel necessary, but do not overbloat it with unnecessary texts. Do not disclose anything private such as tool names or arguments here."
 }
 
 For example, user may have asked "Төрийн юм уу нутгийн хөрөнгөөр худалдаа хийж байгаа хүний хувийн мэдээллийг зөвшөөрөлгүй авч болох уу?". This means user wants to know if he could collect without permission private information of the person in trade with state budget. That's definitely a legal question pertaining to 'private data protection', so your response could be:
@@ -88,14 +128,16 @@ For example, user may have asked "Төрийн юм уу нутгийн хөрө
 {
     "rationale": "User wants to know if it's legally okay to acquire personal data of an entity trading with state budget. This is a legal question and I will look for the vector database.",
     "decision": "tool",
-    "message_to_user": "Аан за, та түр хүлээгээрэй. Би харгалзах хуулийн зохицуулалтыг хайж байна...",
-    "tool": {
-        "name": "search_vector_database",
-        "args": {
-            "query": "Төрийн эсвэл орон нутгийн хөрөнгөөр худалдаа хийж байгаа хүний мэдээллийг цуглуулах зөвшөөрөлтэй холбоотой хуулийн зүйл анги",
-            "limit": 2
+    "tools": [
+        {
+            "name": "search_vector_database",
+            "args": {
+                "query": "Төрийн эсвэл орон нутгийн хөрөнгөөр худалдаа хийж байгаа хүний мэдээллийг цуглуулах зөвшөөрөлтэй холбоотой хуулийн зүйл анги",
+                "limit": 2
+            }
         }
-    }
+    ],
+    "message_to_user": "Аан за, та түр хүлээгээрэй. Би харгалзах хуулийн зохицуулалтыг хайж байна..."
 }
 
 Then the tool response might return as follows:
@@ -110,72 +152,504 @@ Once you see this response, you could generate your response as follows:
 
 Reminder that in your final message_to_user, you always have to tell which article of which law and which chapter were referenced in your conclusion. Otherwise, the user may not be able to trust the soundness of your response.
 """
+        self._refresh_tools()
 
     async def connect_to_servers(self, server_configs: Dict[str, Dict]) -> None:
         """
-        Connect to multiple MCP servers using MultiServerMCPClient
+        Connect to multiple MCP servers using MultiServerMCPClient, keeping one
+        session per server open for the lifetime of the agent.
         Args:
             server_configs: Dictionary mapping server names to their configurations
         """
         self.client = MultiServerMCPClient(server_configs)
-        
-        # Get all tools from all servers
-        self.available_tools = await self.client.get_tools()
+        self.sessions = {name: ServerSession(self.client, name) for name in server_configs}
+
+        # Spawn all servers at once, they initialize independently
+        start_time = time.perf_counter()
+        results = await asyncio.gather(*[session.connect() for session in self.sessions.values()],
+                                       return_exceptions=True)
+
+        for name, result in zip(self.sessions, results):
+            if isinstance(result, BaseException):
+                # the health checks keep reconnecting it and its tools join once it is up
+                logger.error(f"MCP server {name} is not available, continuing without it: {str(result)}")
+
+        if not any(session.is_connected for session in self.sessions.values()):
+            raise ConnectionError("None of the MCP servers could be started")
+
+        self.startup_timings = {
+            name: session.connect_time if session.is_connected else None
+            for name, session in self.sessions.items()
+        }
+        self.startup_timings["servers"] = time.perf_counter() - start_time
+
+        # Render the system prompt with all available tools
+        self._refresh_tools()
 
         logger.info(f"Олдсон функцийн жагсаалт:\n")
         for tool in self.available_tools:
             logger.info(f"Tool: {tool.name}\nDescription: {tool.description}")
-        
-        # Update system prompt with all available tools
-        self.system = Template(self.system).render({"tools": self.available_tools})
 
-    async def handle_request(self, context: List[Dict[str, str]]) -> None:
+    def _refresh_tools(self) -> None:
+        # tools are bound to the session that loaded them, so a reconnect replaces
+        # them, and the system prompt lists the tools of the connected servers
+        self.available_tools = []
+        self.tool_servers = {}
+        for name, session in self.sessions.items():
+            for tool in session.tools:
+                self.available_tools.append(tool)
+                self.tool_servers[tool.name] = name
+
+        self.system = Template(self.system_template).render({"tools": self.available_tools})
+
+    async def call_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+        """
+        Invokes the tool over its server's open session. A transport failure
+        reconnects that server and retries the call once, errors reported by
+        the tool itself are raised as they are. With telemetry enabled the
+        trace context travels in the request metadata to the server's spans.
+        Raises:
+            KeyError: no connected server provides the tool
+        """
+        server_name = self.tool_servers[tool_name]
+
+        with telemetry.span("mcp.call", kind=SPAN_KIND_CLIENT, tool=tool_name, server=server_name) as span:
+            traceparent = span.traceparent()
+            meta = {"traceparent": traceparent} if traceparent is not None else None
+
+            generation = self.sessions[server_name].generation
+            try:
+                return await self.sessions[server_name].call_tool(tool_name, tool_args, meta)
+            except ToolException:
+                raise
+            except Exception as err:
+                logger.warning(f"Tool {tool_name} failed on {server_name}, reconnecting: {err!r}")
+
+            span.set_attribute("reconnected", True)
+            await self.sessions[server_name].reconnect(generation)
+            self._refresh_tools()
+
+            return await self.sessions[server_name].call_tool(tool_name, tool_args, meta)
+
+    async def health_check(self) -> Dict[str, bool]:
+        """
+        Pings every server and reconnects the ones that do not answer.
+        Returns:
+            Dict[str, bool]: server name to whether it was healthy before the check
+        """
+        names = list(self.sessions)
+        generations = {name: self.sessions[name].generation for name in names}
+        results = await asyncio.gather(*[self.sessions[name].ping() for name in names])
+        health = dict(zip(names, results))
+
+        for name, healthy in health.items():
+            if not healthy:
+                try:
+                    await self.sessions[name].reconnect(generations[name])
+                    self._refresh_tools()
+                except Exception as err:
+                    logger.error(f"Reconnecting to {name} failed: {str(err)}")
+
+        return health
+
+    def start_health_checks(self, interval: float = 30.0) -> None:
+        """
+        Runs `health_check` in the background every `interval` seconds.
+        """
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                _ = await self.health_check()
+
+        self._health_task = asyncio.create_task(run())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+        for session in self.sessions.values():
+            await session.close()
+
+        if self.embedder is not None:
+            await self.embedder.close()
+        if self.answer_cache is not None:
+            self.answer_cache.close()
+        telemetry.flush()
+
+    async def _run_tool(self, tool_name: str, tool_args: Dict[str, Any],
+                        prefetch: Optional[Prefetch], seen_calls: Set[str]) -> Tuple[str, bool]:
+        """
+        Runs one requested tool. Responses come from the tool-result cache when
+        possible, then from the speculative prefetch when it matches, and only
+        then from the server. A call already made in this request is flagged
+        to the model so that it stops repeating it.
+        Returns:
+            Tuple[str, bool]: context message of the tool response and whether
+                the prefetch was consumed or discarded by this request
+        """
+        if tool_name not in self.tool_servers:
+            return f"Tool {tool_name} not found", False
+
+        key = self.tool_cache.key(self.tool_servers[tool_name], tool_name, tool_args)
+        is_repeat = key in seen_calls
+        seen_calls.add(key)
+
+        with telemetry.span("agent.tool", tool=tool_name) as span:
+            tool_response = self.tool_cache.get(key)
+            is_prefetch_settled = False
+            source = "cache"
+
+            if tool_response is None:
+                is_prefetched = False
+                if prefetch is not None:
+                    is_prefetched, tool_response = await self.speculator.resolve(prefetch, tool_name, tool_args)
+                    is_prefetch_settled = tool_name == self.speculator.tool_name
+
+                # Invoke the tool over its server's open session
+                source = "prefetch" if is_prefetched else "server"
+                if is_prefetched:
+                    # the result answers the raw user query, not the requested paraphrase
+                    prefetch_key = self.tool_cache.key(self.tool_servers[tool_name], tool_name, prefetch.args)
+                    self.tool_cache.put(prefetch_key, tool_name, tool_response)
+                else:
+                    tool_response = await self.call_tool(tool_name, tool_args)
+                    self.tool_cache.put(key, tool_name, tool_response)
+
+            span.set_attribute("source", source)
+
+        if is_repeat:
+            logger.info(f"Repeated call of {tool_name} with {tool_args}")
+            return (f"TOOL RESPONSE SAYS ({tool_name}, REPEATED CALL):\n"
+                    f"You already made this exact call earlier for this query, its response is repeated below. "
+                    f"Do not call it again, use this response or choose a different action.\n{tool_response}"), is_prefetch_settled
+
+        return f"TOOL RESPONSE SAYS ({tool_name}):\n{tool_response}", is_prefetch_settled
+
+    async def _run_tool_with_timeout(self, tool_name: str, tool_args: Dict[str, Any],
+                                     prefetch: Optional[Prefetch], seen_calls: Set[str]) -> Tuple[str, bool]:
+        try:
+            return await asyncio.wait_for(self._run_tool(tool_name, tool_args, prefetch, seen_calls), timeout=self.tool_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool {tool_name} timed out after {self.tool_timeout:g}s")
+            return f"Tool {tool_name} timed out after {self.tool_timeout:g} seconds", prefetch is not None
+        except Exception as err:
+            logger.error(f"Tool {tool_name} failed: {str(err)}")
+            return f"Tool {tool_name} failed: {str(err)}", prefetch is not None
+
+    async def _run_tools(self, calls: List[Dict[str, Any]], prefetch: Optional[Prefetch],
+                         seen_calls: Set[str]) -> Tuple[List[str], bool]:
+        """
+        Runs all tool calls of one step concurrently, each under `tool_timeout`.
+        Only the first vector search may consume the prefetch, the others run as requested.
+        Returns:
+            Tuple[List[str], bool]: context messages in the order of the calls and
+                whether the prefetch was settled
+        """
+        speculative = None
+        if prefetch is not None:
+            speculative = next((index for index, call in enumerate(calls)
+                                if call["name"] == self.speculator.tool_name), None)
+
+        results = await asyncio.gather(*[
+            self._run_tool_with_timeout(call["name"], call.get("args", {}),
+                                        prefetch if index == speculative else None, seen_calls)
+            for index, call in enumerate(calls)
+        ])
+
+        return [content for content, _ in results], any(settled for _, settled in results)
+
+    @staticmethod
+    def _tool_calls(model_response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # `tools` holds the calls of a step, a single `tool` object is still accepted
+        calls = model_response.get("tools")
+        if calls is None:
+            calls = [model_response["tool"]] if "tool" in model_response else []
+        elif isinstance(calls, dict):
+            calls = [calls]
+
+        return [call for call in calls if isinstance(call, dict) and "name" in call]
+
+    async def handle_request(self, context: List[Dict[str, str]],
+                             on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                             session_id: Optional[str] = None) -> List[Dict[str, float]]:
         """
         Multi-step (possibly) circulation to solve a single user request.
         In comparison to the single server MCP used in stdio_client.py it abstracts away
-        the use of exit stack and sessions.
+        the use of exit stack and sessions. Requests keep their state in local variables,
+        so many of them can run concurrently over the shared model client and MCP sessions.
 
         Args:
             context (List[Dict[str, str]): User query currently in absence of context
+            on_event (Callable[[str, Dict[str, Any]], None]): optional receiver of the
+                request's progress instead of the terminal: "message" text deltas,
+                "tools" dispatches, the final "answer" and "error"
+            session_id (str): optional 32 hex digit id of the session, used as the trace
+                id of the request's spans in the agent and in the MCP servers
+
+        Returns:
+            List[Dict[str, float]]: time to the first streamed token, generation and tool
+                timings of every step of the request, empty when the answer came from the answer cache
         """
-
-        is_process = True
-        while is_process:
-            
+        step_times: List[Dict[str, float]] = []
+        with telemetry.span("agent.request", trace_id=session_id) as span:
+            await self._handle_request(context, on_event, span, step_times)
+
+        return step_times
+
+    async def _handle_request(self, context: List[Dict[str, str]],
+                              on_event: Optional[Callable[[str, Dict[str, Any]], None]], span: Any,
+                              step_times: List[Dict[str, float]]) -> None:
+        on_text = None
+        if on_event is not None:
+            on_text = lambda text: on_event("message", {"text": text})
+
+        # A semantically equal question answered before skips the model entirely
+        query = context[-1]["content"]
+        query_vector = None
+        if self.answer_cache is not None and self.embedder is not None:
+            lookup_start = time.perf_counter()
+            with telemetry.span("answer_cache.lookup") as lookup_span:
+                try:
+                    query_vector = await self.embedder.encode(query)
+                    cached = self.answer_cache.lookup(query_vector)
+                except Exception as err:
+                    logger.warning(f"Answer cache lookup failed: {str(err)}")
+                    cached = None
+                lookup_span.set_attribute("hit", cached is not None)
+
+            if cached is not None:
+                logger.info(f"Answer cache hit (similarity {cached['similarity']:.3f}) "
+                            f"in {(time.perf_counter() - lookup_start) * 1000:.1f}ms")
+                span.set_attribute("cached_answer", True)
+                if on_event is not None:
+                    on_event("answer", {"message": cached["answer"], "cached": True})
+                else:
+                    print(f"\033[32m>>>АГЕНТ: {cached['answer']}\033[0m\n")
+                return
+
+        # Search the raw user query while the model produces its first step
+        prefetch = None
+        if self.speculator is not None and self.speculator.tool_name in self.tool_servers:
+            prefetch = self.speculator.prefetch(query)
+
+        seen_calls: Set[str] = set()
+
+        try:
+            is_process = True
+            while is_process:
+
+                step_start = time.perf_counter()
+
+                # The tools are started from the stream as soon as their list is closed
+                early = {}
+
+                def drop_early() -> None:
+                    # tools dispatched for a decision that turned out otherwise, the calls
+                    # they marked as seen are unmarked so that a later real call isn't a repeat
+                    if "task" in early:
+                        early.pop("task").cancel()
+                        seen_calls.difference_update(early.pop("new_calls"))
+                    early.pop("calls", None)
+
+                def on_field(key: str, value: Any) -> None:
+                    if key == "decision":
+                        early["decision"] = value
+                    elif key in ("tool", "tools") and early.get("decision") != "answer":
+                        calls = self._tool_calls({key: value})
+                        # an escalated turn asking for the same calls keeps the fast model's dispatch
+                        if calls and calls != early.get("calls"):
+                            drop_early()
+                            early["calls"] = calls
+                            early["new_calls"] = {
+                                self.tool_cache.key(self.tool_servers[call["name"]], call["name"], call.get("args", {}))
+                                for call in calls if call["name"] in self.tool_servers
+                            } - seen_calls
+                            early["task"] = asyncio.create_task(self._run_tools(calls, prefetch, seen_calls))
+
+                async def on_escalate() -> None:
+                    # the strong model decides afresh, its own fields dispatch or drop the tools
+                    early.pop("decision", None)
+
+                # Older tool responses are shrunk before the context is resent
+                prompt = self.context_manager.prepare(context)
+                generation_stats = {}
+                
+                # turns of sessions already under way are scheduled before new sessions
+                priority = PRIORITY_INTERMEDIATE if step_times else PRIORITY_FIRST
+                raw_response_output = await self._generate_turn(context, on_field, generation_stats, on_text,
+                                                                priority, on_escalate)
+                logger.info(
+                    f"Turn {len(step_times) + 1} prompt: ~{prompt['prompt']} tokens "
+                    f"(stable prefix ~{prompt['prefix']}, compacted away ~{prompt['removed']}), "
+                    f"reported {generation_stats.get('prompt_tokens', 'n/a')} "
+                    f"(cached {generation_stats.get('cached_tokens', 'n/a')})"
+                )
+                generation_time = time.perf_counter() - step_start
+
+                try:
+                    model_response = json.loads(raw_response_output)
+
+                    if model_response["decision"] == "tool":
+                        calls = self._tool_calls(model_response)
+                        if calls:
+                            if calls == early.get("calls") and "task" in early:
+                                task = early.pop("task")
+                            else:
+                                drop_early()
+                                task = self._run_tools(calls, prefetch, seen_calls)
+
+                            if on_event is not None:
+                                on_event("tools", {"names": [call["name"] for call in calls]})
+                            contents, is_prefetch_settled = await task
+                            if is_prefetch_settled:
+                                prefetch = None
+
+                            # all results are in the context before the next model turn
+                            for content in contents:
+                                context.append({"role": "assistant", "content": content})
+
+                        self._record_step(step_times, step_start, generation_time, len(calls),
+                                          generation_stats.get("first_token_at"))
+                    else:
+                        self._record_step(step_times, step_start, generation_time, 0,
+                                          generation_stats.get("first_token_at"))
+                        if on_event is not None:
+                            on_event("answer", {"message": model_response.get("message_to_user", ""), "cached": False})
+                        if query_vector is not None:
+                            self._store_answer(query, query_vector, model_response.get("message_to_user", ""), context)
+                        is_process = False
+                        return
+
+                except ValueError as e:
+                    logging.error(f"Parsing error: {str(e)}")
+                    if on_event is not None:
+                        on_event("error", {"error": f"Parsing error: {str(e)}"})
+                    is_process=False
+
+                except Exception as e:
+                    logging.error(f"Unexpected exception took place: {e}")
+                    if on_event is not None:
+                        on_event("error", {"error": str(e)})
+                    is_process=False
+
+                finally:
+                    drop_early()
+
+        finally:
+            span.set_attribute("turns", len(step_times))
+            span.set_attribute("tool_calls", sum(step["tool_calls"] for step in step_times))
+            if self.speculator is not None:
+                if prefetch is not None:
+                    self.speculator.discard(prefetch)
+                logger.info(f"Speculative search stats: {self.speculator.stats()}")
+            logger.info(f"Tool cache stats: {self.tool_cache.stats()}")
+            logger.info(f"Model routing stats: {self.router.stats()}")
+            if self.scheduler is not None:
+                logger.info(f"Model scheduler stats: {self.scheduler.stats()}")
+
+    async def _generate_turn(self, context: List[Dict[str, str]], on_field: Callable[[str, Any], None],
+                             stats: Dict[str, Any], on_text: Optional[Callable[[str], None]] = None,
+                             priority: int = PRIORITY_INTERMEDIATE,
+                             on_escalate: Optional[Callable[[], Awaitable[None]]] = None) -> str:
+        """
+        Generates one turn through the model router. The fast model's turn is kept
+        when it calls tools; it is stopped as soon as it decides to answer, and the
+        answer, like any invalid output, is generated again by the strong model,
+        with the highest scheduling priority when it is known to be the final answer.
+        `on_escalate` is awaited before the strong model starts.
+        """
+        router = self.router
+        call_start = time.perf_counter()
+        if not router.is_tiered:
             raw_response_output = await generate_message(
-                self.model_client,
-                model=self.model_name,
-                context=context
+                self.model_client, model=router.strong_model, context=context, on_field=on_field,
+                stats=stats, on_text=on_text, scheduler=self.scheduler, priority=priority
             )
-
+            router.record(router.strong_model, stats)
+            _set_first_token(stats, call_start)
+            return raw_response_output
+
+        def fast_on_field(key: str, value: Any) -> bool:
+            if key == "decision" and value != "tool":
+                return True
+            on_field(key, value)
+            return False
+
+        raw_response_output = await generate_message(
+            self.model_client, model=router.fast_model, context=context, on_field=fast_on_field,
+            stats=stats, on_text=on_text, scheduler=self.scheduler, priority=priority
+        )
+        router.record(router.fast_model, stats)
+        _set_first_token(stats, call_start)
+
+        if stats["aborted"]:
+            router.escalate("answer")
+            priority = PRIORITY_FINAL
+        else:
             try:
                 model_response = json.loads(raw_response_output)
-
-                if model_response["decision"] == "tool":
-                    if "tool" in model_response:
-                        tool_name = model_response["tool"]["name"]
-                        tool_args = model_response["tool"]["args"]
-
-                        # Find and invoke the tool (works across all servers)
-                        tool = next((t for t in self.available_tools if t.name == tool_name), None)
-                        if tool:
-                            tool_response = await tool.ainvoke(tool_args)
-                            context.append({"role": "assistant", 
-                                          "content": f"TOOL RESPONSE SAYS:\n{tool_response}"})
-                        else:
-                            context.append({"role": "assistant", 
-                                          "content": f"Tool {tool_name} not found"})
-                else:
-                    is_process = False
-                    return
-
-            except ValueError as e:
-                logging.error(f"Parsing error: {str(e)}")
-                is_process=False
-
-            except Exception as e:
-                logging.error(f"Unexpected exception took place: {e}")
-                is_process=False
+                if model_response.get("decision") == "tool" and self._tool_calls(model_response):
+                    return raw_response_output
+            except ValueError:
+                pass
+            router.escalate("invalid")
+
+        if on_escalate is not None:
+            await on_escalate()
+
+        strong_stats = {}
+        strong_start = time.perf_counter()
+        raw_response_output = await generate_message(
+            self.model_client, model=router.strong_model, context=context, on_field=on_field,
+            stats=strong_stats, on_text=on_text, scheduler=self.scheduler, priority=priority
+        )
+        router.record(router.strong_model, strong_stats)
+        _set_first_token(strong_stats, strong_start)
+
+        # the turn's first token is the fast model's when it streamed any
+        first_token_at = stats.get("first_token_at", strong_stats.get("first_token_at"))
+        stats.clear()
+        stats.update(strong_stats)
+        if first_token_at is not None:
+            stats["first_token_at"] = first_token_at
+        return raw_response_output
+
+    def _store_answer(self, query: str, query_vector: List[float], answer: str,
+                      context: List[Dict[str, str]]) -> None:
+        """
+        Caches a final answer with the law articles it cites. Articles named in the
+        answer are taken as cited, otherwise every article retrieved for the query
+        is. Answers without database articles (web searches, refusals) are not cached.
+        """
+        retrieved: List[ArticleKey] = []
+        for message in context:
+            if message["content"].startswith("TOOL RESPONSE SAYS (search_vector_database"):
+                retrieved.extend(parse_article_keys(message["content"]))
+
+        if not retrieved or not answer:
+            return
+
+        cited = [key for key in retrieved if key[2] in answer] or retrieved
+        try:
+            self.answer_cache.store(query, query_vector, answer, cited)
+        except Exception as err:
+            logger.warning(f"Storing the answer failed: {str(err)}")
+
+    def _record_step(self, step_times: List[Dict[str, float]], step_start: float,
+                     generation_time: float, tool_calls: int, first_token_at: Optional[float]) -> None:
+        step = {
+            "first_token": first_token_at - step_start if first_token_at is not None else None,
+            "generation": generation_time,
+            "tools": time.perf_counter() - step_start - generation_time,
+            "total": time.perf_counter() - step_start,
+            "tool_calls": tool_calls
+        }
+        step_times.append(step)
+        logger.info(
+            f"Step {len(step_times)}: generation {step['generation'] * 1000:.0f}ms, "
+            f"{tool_calls} tool calls {step['tools'] * 1000:.0f}ms, total {step['total'] * 1000:.0f}ms"
+        )
 
     async def initiate_cycle(self) -> None:
         """
@@ -187,7 +661,8 @@ Reminder that in your final message_to_user, you always have to tell which artic
 
         while True:
             try:
-                query = input(">>> ").strip()
+                # read in a thread so that health checks keep running meanwhile
+                query = (await asyncio.to_thread(input, ">>> ")).strip()
 
                 if query.lower().strip() == "quit":
                     print(f"Quitting the interaction cycle...")
@@ -199,8 +674,7 @@ Reminder that in your final message_to_user, you always have to tell which artic
                     { "role" : "user", "content": query }
                 ]
 
-                response = await self.handle_request(context)
-                print(f"Response: {response}\n")
+                _ = await self.handle_request(context)
             
             except Exception as e:
                 print(f"Exception in the midst of interaction. {e}")
\ No newline at end of file
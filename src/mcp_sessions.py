@@ -0,0 +1,191 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+import asyncio
+import logging
+
+from typing import Any, Dict, List, Optional, Union
+
+from mcp import ClientSession
+from mcp.types import TextContent, TextResourceContents
+from langchain_core.tools import BaseTool, ToolException
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+CONNECT_TIMEOUT = 60.0
+PING_TIMEOUT = 5.0
+CLOSE_TIMEOUT = 5.0
+
+class ServerSession:
+    """
+    Long-lived MCP session to a single configured server. The server process is
+    spawned once and its tools are bound to the open session, so a tool call costs
+    one request on the existing pipe instead of a fresh process start-up.
+
+    The session context is entered and exited by one dedicated task, as the stdio
+    transport's cancel scopes must not cross task boundaries.
+    """
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str) -> None:
+        self.client = client
+        self.server_name = server_name
+        self.session: Optional[ClientSession] = None
+        self.tools: List[BaseTool] = []
+        self.reconnects = 0
+        # incremented by every successful connect, so that concurrent callers that
+        # saw the same broken session reconnect it only once
+        self.generation = 0
+        # seconds the last successful connect took, from spawn to loaded tools
+        self.connect_time: Optional[float] = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._reconnect_lock = asyncio.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def _hold(self) -> None:
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.tools = await load_mcp_tools(session)
+                self.session = session
+                self._ready.set()
+
+                await self._closing.wait()
+        finally:
+            self.session = None
+
+    async def connect(self, timeout: float = CONNECT_TIMEOUT) -> None:
+        """
+        Starts the server process and waits until its tools are loaded.
+        Args:
+            timeout (float): seconds to wait for the server to initialize
+        """
+        start_time = time.perf_counter()
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._hold(), name=f"mcp-session-{self.server_name}")
+
+        ready = asyncio.create_task(self._ready.wait())
+        done, _ = await asyncio.wait({self._task, ready}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+        if ready not in done:
+            ready.cancel()
+            if self._task in done:
+                # the session context failed before it was ready, surface the reason
+                raise ConnectionError(f"MCP server {self.server_name} failed to start: {self._task.exception()!r}")
+
+            await self.close()
+            raise ConnectionError(f"MCP server {self.server_name} did not initialize within {timeout:.0f}s")
+
+        self.generation += 1
+        self.connect_time = time.perf_counter() - start_time
+        logger.info(f"MCP session to {self.server_name} is open with {len(self.tools)} tools "
+                    f"after {self.connect_time:.2f}s")
+
+    async def ping(self, timeout: float = PING_TIMEOUT) -> bool:
+        """
+        Health check of the session: the server has to answer an MCP ping in time.
+        """
+        if not self.is_connected:
+            return False
+
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+            return True
+        except Exception as err:
+            logger.warning(f"MCP server {self.server_name} failed the health check: {err!r}")
+            return False
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any],
+                        meta: Optional[Dict[str, Any]] = None) -> Union[str, List[str]]:
+        """
+        Calls a tool on the open session with optional request metadata (e.g. the
+        trace context), converting the result like the loaded LangChain tools do.
+        Raises:
+            ToolException: the tool reported an error
+        """
+        result = await self.session.call_tool(name, arguments, meta=meta)
+
+        texts = [content.text for content in result.content if isinstance(content, TextContent)]
+        response = texts[0] if len(texts) == 1 else texts
+        if result.isError:
+            raise ToolException(response)
+
+        return response
+
+    async def metrics(self) -> str:
+        """
+        Prometheus text of the server's `metrics://` resources, empty when it has none.
+        """
+        if not self.is_connected:
+            return ""
+
+        try:
+            resources = await self.session.list_resources()
+            texts = []
+            for resource in resources.resources:
+                if str(resource.uri).startswith("metrics://"):
+                    result = await self.session.read_resource(resource.uri)
+                    texts.extend(content.text for content in result.contents if isinstance(content, TextResourceContents))
+        except Exception as err:
+            logger.info(f"No metrics from MCP server {self.server_name}: {err!r}")
+            return ""
+
+        return "".join(texts)
+
+    async def reconnect(self, generation: Optional[int] = None) -> None:
+        """
+        Restarts the server process. Concurrent callers are serialized, and a caller
+        passing the `generation` it saw failing returns at once when another caller
+        has reconnected the session since.
+        """
+        async with self._reconnect_lock:
+            if generation is not None and generation != self.generation and self.is_connected:
+                return
+
+            await self.close()
+            await self.connect()
+            self.reconnects += 1
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+
+        self._closing.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"MCP server {self.server_name} did not shut down in time")
+        except Exception as err:
+            # a session that already broke raises its transport error on exit
+            logger.info(f"MCP session to {self.server_name} closed with: {err!r}")
+
+        self._task = None
+        self.session = None
@@ -0,0 +1,132 @@
+import sys
+import time
+import argparse
+import weaviate
+
+from typing import Any, Dict
+
+from src.database_management import VectorIndexSettings, LAW_DOCUMENT_PROPERTIES, QUANTIZERS
+
+from dotenv import load_dotenv
+load_dotenv()
+
+def copy_collection(client: Any, source_name: str, target_name: str,
+                    settings: VectorIndexSettings, batch_size: int = 100) -> Dict[str, int]:
+    """
+    Creates `target_name` with the vector index `settings` and copies every object
+    of `source_name` into it under the same uuid, with its stored vector, so that
+    nothing is embedded again.
+
+    Returns:
+        Dict[str, int]: objects read from the source and stored in the target
+    """
+    source = client.collections.get(source_name)
+    target = client.collections.create(
+        name=target_name,
+        properties=LAW_DOCUMENT_PROPERTIES,
+        vector_index_config=settings.create_config()
+    )
+
+    copied = 0
+    start_time = time.perf_counter()
+
+    with target.batch.fixed_size(batch_size=batch_size) as batch:
+        for obj in source.iterator(include_vector=True):
+            batch.add_object(
+                properties=obj.properties,
+                uuid=obj.uuid,
+                vector=obj.vector["default"]
+            )
+            copied += 1
+            if batch.number_errors > 10:
+                print("Copy stopped due to excessive errors.")
+                break
+
+    failed_objects = target.batch.failed_objects
+    if failed_objects:
+        print(f"Number of failed copies: {len(failed_objects)}")
+        print(f"First failed object: {failed_objects[0]}")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Copied {copied} objects in {elapsed:.2f}s ({copied / max(elapsed, 1e-9):.1f} objects/sec)")
+
+    return {
+        "copied": copied,
+        "stored": target.aggregate.over_all(total_count=True).total_count
+    }
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Applies the HNSW and compression settings (WEAVIATE_HNSW_*, WEAVIATE_QUANTIZER, ...) "
+                    "to an existing collection, in place or by copying it into a new one."
+    )
+    parser.add_argument("--collection", default="LawDocuments")
+    parser.add_argument("--copy-to", default=None,
+                        help="new collection created with the settings, required for immutable parameters")
+    parser.add_argument("--drop-source", action="store_true",
+                        help="delete the source collection once every object has been copied")
+    parser.add_argument("--dry-run", action="store_true", help="only print the differences")
+    parser.add_argument("--ef", type=int, default=None)
+    parser.add_argument("--ef-construction", type=int, default=None)
+    parser.add_argument("--max-connections", type=int, default=None)
+    parser.add_argument("--quantizer", choices=QUANTIZERS, default=None)
+    parser.add_argument("--rescore-limit", type=int, default=None)
+    parser.add_argument("--pq-segments", type=int, default=None)
+    parser.add_argument("--pq-training-limit", type=int, default=None)
+    args = parser.parse_args()
+
+    # command line values override the environment
+    settings = VectorIndexSettings.from_env()
+    for name in vars(settings):
+        if getattr(args, name) is not None:
+            setattr(settings, name, getattr(args, name))
+
+    client = weaviate.connect_to_local()
+    try:
+        collection = client.collections.get(args.collection)
+        if not collection.exists():
+            print(f"Collection {args.collection} does not exist.")
+            sys.exit(1)
+
+        differences = settings.differences(collection.config.get().vector_index_config)
+        if not differences and args.copy_to is None:
+            print(f"{args.collection} already matches the settings: {settings.as_dict()}")
+            sys.exit(0)
+
+        for name, (current, wanted, mutable) in differences.items():
+            print(f"{name:<18} {str(current):>8} -> {str(wanted):<8} {'in place' if mutable else 'requires a copy'}")
+
+        in_place = all(mutable for _, _, mutable in differences.values())
+        if args.dry_run:
+            sys.exit(0)
+
+        if args.copy_to is None:
+            if not in_place:
+                print(f"Pass --copy-to <name> to create a collection with the new settings and copy "
+                      f"{args.collection} into it.")
+                sys.exit(1)
+
+            collection.config.update(vector_index_config=settings.update_config())
+            print(f"Updated {args.collection}: {settings.as_dict()}")
+            sys.exit(0)
+
+        if client.collections.exists(args.copy_to):
+            print(f"Collection {args.copy_to} already exists.")
+            sys.exit(1)
+
+        source_count = collection.aggregate.over_all(total_count=True).total_count
+        summary = copy_collection(client, args.collection, args.copy_to, settings)
+
+        if summary["stored"] != source_count:
+            print(f"{args.copy_to} holds {summary['stored']} of {source_count} objects, "
+                  f"{args.collection} is left in place.")
+            sys.exit(1)
+
+        if args.drop_source:
+            client.collections.delete(args.collection)
+            print(f"Deleted {args.collection}.")
+
+        print(f"Set WEAVIATE_COLLECTION={args.copy_to} for the agent, the MCP server and the ingestion script.")
+    finally:
+        client.close()
@@ -0,0 +1,83 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+
+from typing import Any, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+class ModelRouter:
+    """
+    Two-tier routing of the ReAct turns. Every turn is first generated by the
+    small `fast_model`; as long as it decides to call tools its output is used.
+    A final answer, or output that is not a valid decision, is escalated and the
+    turn is generated again by the `strong_model`.
+    """
+
+    def __init__(self, strong_model: str, fast_model: Optional[str] = None) -> None:
+        self.strong_model = strong_model
+        self.fast_model = fast_model
+
+        self.escalations: Dict[str, int] = {"answer": 0, "invalid": 0}
+        self.models: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def is_tiered(self) -> bool:
+        return bool(self.fast_model) and self.fast_model != self.strong_model
+
+    def record(self, model: str, stats: Dict[str, Any]) -> None:
+        """
+        Adds the latency and the token usage of one generation to the model's totals.
+        """
+        totals = self.models.setdefault(model, {
+            "calls": 0, "aborted": 0, "seconds": 0.0,
+            "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0
+        })
+        totals["calls"] += 1
+        totals["aborted"] += int(stats.get("aborted", False))
+        totals["seconds"] += stats.get("timings", {}).get("total", 0.0)
+        for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+            totals[key] += stats.get(key, 0) or 0
+
+        logger.info(
+            f"Model {model}: {stats.get('timings', {}).get('total', 0.0) * 1000:.0f}ms, "
+            f"prompt {stats.get('prompt_tokens', 'n/a')} / completion {stats.get('completion_tokens', 'n/a')} tokens"
+        )
+
+    def escalate(self, reason: str) -> None:
+        self.escalations[reason] += 1
+        logger.info(f"Escalating the turn to {self.strong_model}: {reason}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "escalations": dict(self.escalations),
+            "models": {
+                model: {
+                    **totals,
+                    "seconds": round(totals["seconds"], 3),
+                    "mean_ms": round(totals["seconds"] / max(totals["calls"], 1) * 1000, 1)
+                }
+                for model, totals in self.models.items()
+            }
+        }
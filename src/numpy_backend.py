@@ -0,0 +1,370 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import re
+import math
+import time
+import fnmatch
+import logging
+import threading
+import numpy as np
+
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional
+
+from src.embedding_cache import EmbeddingCache
+from src.article_index import ArticleIndex, log_index_footprint
+from utils.telemetry import telemetry
+from src.storage_backend import (StorageBackend, EMBED_BATCH_SIZE, EMBED_MAX_IN_FLIGHT,
+                                 chunk_uuid, chunk_properties)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+METADATA_FIELDS = ("uuid", "order_id", "document", "chapter", "article", "chunk_body", "content_hash")
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.casefold())
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    low, high = scores.min(), scores.max()
+    if high - low < 1e-12:
+        return np.zeros_like(scores)
+    return (scores - low) / (high - low)
+
+class _BM25:
+    """
+    Okapi BM25 over the article names and chunk bodies, used for the keyword
+    half of hybrid queries.
+    """
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+
+        documents = [Counter(_tokenize(text)) for text in texts]
+        self.lengths = np.array([sum(document.values()) for document in documents], dtype=np.float32)
+        self.average_length = float(self.lengths.mean()) if self.size else 1.0
+
+        postings: Dict[str, List[tuple]] = {}
+        for i, document in enumerate(documents):
+            for term, frequency in document.items():
+                postings.setdefault(term, []).append((i, frequency))
+
+        self.postings = {}
+        for term, entries in postings.items():
+            indices, frequencies = zip(*entries)
+            idf = math.log(1 + (self.size - len(entries) + 0.5) / (len(entries) + 0.5))
+            self.postings[term] = (
+                np.array(indices, dtype=np.int64),
+                np.array(frequencies, dtype=np.float32),
+                idf
+            )
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(_tokenize(query)):
+            if term not in self.postings:
+                continue
+            indices, frequencies, idf = self.postings[term]
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[indices] / max(self.average_length, 1e-9))
+            scores[indices] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+
+        return scores
+
+class NumpyDatabaseManager(StorageBackend):
+    """
+    Embedded alternative to the Weaviate backed DatabaseManager for single-law
+    deployments and tests. The normalized chunk vectors live in a contiguous
+    float32 matrix memory-mapped from `store_path`, the chunk properties in
+    parallel arrays, and searches are a vectorized dot product.
+    """
+
+    def __init__(self, embedding_host: str, store_path: str = "vector_store",
+                 embedding_cache: Optional[EmbeddingCache] = None) -> None:
+        super().__init__(embedding_host, embedding_cache)
+        self.store_path = store_path
+        self.vectors_path = os.path.join(store_path, "vectors.npy")
+        self.metadata_path = os.path.join(store_path, "metadata.npz")
+
+        self._lock = threading.RLock()
+        self._bm25: Optional[_BM25] = None
+
+        os.makedirs(store_path, exist_ok=True)
+        self._load()
+
+        logger.info(f"Vector store loaded: {store_path} ({self.count()} chunks)")
+
+        self.check_embedder()
+        self.build_index()
+
+    def build_index(self) -> ArticleIndex:
+        index = ArticleIndex()
+        with self._lock:
+            index.add(self._properties(i) for i in range(self.count()))
+
+        self.article_index = index
+        log_index_footprint(index)
+
+        return index
+
+    def _store_mtime(self) -> Optional[int]:
+        # the metadata file is swapped in last, so its change marks a complete rewrite
+        try:
+            return os.stat(self.metadata_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> None:
+        self._loaded_mtime = self._store_mtime()
+
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.metadata_path)):
+            self.vectors = np.empty((0, 0), dtype=np.float32)
+            self.metadata = {field: np.array([], dtype=np.int64 if field == "order_id" else str)
+                             for field in METADATA_FIELDS}
+            return
+
+        stored = np.load(self.metadata_path)
+        metadata = {
+            # stores written before content hashing have no hashes, so every chunk counts as changed
+            field: stored[field] if field in stored else np.full(len(stored["uuid"]), "", dtype=str)
+            for field in METADATA_FIELDS
+        }
+
+        # zero-sized arrays cannot be memory-mapped
+        if len(metadata["uuid"]) > 0:
+            vectors = np.load(self.vectors_path, mmap_mode="r")
+        else:
+            vectors = np.load(self.vectors_path)
+
+        if len(vectors) != len(metadata["uuid"]):
+            raise ValueError(f"Vector store {self.store_path} has {len(vectors)} vectors "
+                             f"for {len(metadata['uuid'])} chunks, it is being rewritten")
+
+        self.vectors = vectors
+        self.metadata = metadata
+
+    def _refresh(self) -> None:
+        """
+        Reloads the store when another process, e.g. the ingestion script, has
+        rewritten it since it was loaded, so that its chunks become searchable
+        as they do with Weaviate.
+        """
+        if self._store_mtime() == self._loaded_mtime:
+            return
+
+        with self._lock:
+            if self._store_mtime() == self._loaded_mtime:
+                return
+            try:
+                self._load()
+            except (OSError, ValueError) as err:
+                # a rewrite in progress is picked up by a later call
+                logger.warning(f"Reloading the vector store failed: {str(err)}")
+                self._loaded_mtime = None
+                return
+
+            self._bm25 = None
+            self.build_index()
+            logger.info(f"Vector store reloaded: {self.store_path} ({len(self.metadata['uuid'])} chunks)")
+
+    def _save(self, vectors: np.ndarray, metadata: Dict[str, np.ndarray]) -> None:
+        """
+        Writes both files next to the old ones and swaps them in, so a crash
+        mid-write never leaves a half written store behind.
+        """
+        with open(f"{self.vectors_path}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        with open(f"{self.metadata_path}.tmp", "wb") as f:
+            np.savez(f, **metadata)
+
+        os.replace(f"{self.vectors_path}.tmp", self.vectors_path)
+        os.replace(f"{self.metadata_path}.tmp", self.metadata_path)
+
+        self._load()
+        self._bm25 = None
+
+    def _properties(self, i: int, metadata: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+        metadata = self.metadata if metadata is None else metadata
+        return {
+            "order_id": int(metadata["order_id"][i]),
+            "document": str(metadata["document"][i]),
+            "chapter": str(metadata["chapter"][i]),
+            "article": str(metadata["article"][i]),
+            "chunk_body": str(metadata["chunk_body"][i]),
+            "content_hash": str(metadata["content_hash"][i])
+        }
+
+    def _keep(self, keep: np.ndarray) -> None:
+        self._save(
+            self.vectors[keep],
+            {field: values[keep] for field, values in self.metadata.items()}
+        )
+
+    def insert(self, chunks: List[Dict[str, str]],
+               embed_batch_size: int = EMBED_BATCH_SIZE,
+               max_in_flight: int = EMBED_MAX_IN_FLIGHT) -> List[str]:
+
+        print(f"Chunks received for insertion={len(chunks)}")
+
+        start_time = time.perf_counter()
+
+        try:
+            inserted_chunks = []
+            inserted_vectors = []
+            for chunk_batch, vectors in self._embed_batches(chunks, embed_batch_size, max_in_flight):
+                inserted_chunks.extend(chunk_batch)
+                inserted_vectors.extend(vectors)
+
+            if not inserted_chunks:
+                return []
+
+            new_vectors = _normalize(np.asarray(inserted_vectors, dtype=np.float32))
+            uuids = [chunk_uuid(chunk) for chunk in inserted_chunks]
+            properties = [chunk_properties(chunk) for chunk in inserted_chunks]
+
+            with self._lock:
+                # rows with the same UUID are replaced, as in a Weaviate batch
+                keep = ~np.isin(self.metadata["uuid"], uuids)
+
+                if self.count() > 0:
+                    vectors = np.concatenate([self.vectors[keep], new_vectors])
+                else:
+                    vectors = new_vectors
+
+                new_metadata = {"uuid": np.array(uuids, dtype=str)}
+                for field in METADATA_FIELDS[1:]:
+                    new_metadata[field] = np.array(
+                        [prop[field] for prop in properties],
+                        dtype=np.int64 if field == "order_id" else str
+                    )
+                metadata = {
+                    field: np.concatenate([self.metadata[field][keep], new_metadata[field]])
+                    for field in METADATA_FIELDS
+                }
+
+                self._save(vectors, metadata)
+                self.article_index.add(inserted_chunks)
+
+            # cached agent answers citing a rewritten article are stale now
+            if self.answer_cache is not None:
+                self.answer_cache.invalidate_articles(ArticleIndex.key_of(chunk) for chunk in inserted_chunks)
+
+        except Exception as err:
+            print(f"Exception occured in insertion:\n{str(err)}")
+            return []
+
+        elapsed = time.perf_counter() - start_time
+        print(f"Inserted {len(uuids)} chunks in {elapsed:.2f}s ({len(uuids) / max(elapsed, 1e-9):.1f} chunks/sec)")
+
+        return uuids
+
+    def read(self, query: str, limit: int = 2, alpha: Optional[float] = None) -> List[str]:
+
+        with telemetry.span("db.encode"):
+            query_vector = _normalize(np.asarray(self.encode([query])[0], dtype=np.float32))
+
+        self._refresh()
+
+        # writes replace the arrays, so the rows of this snapshot stay consistent
+        with self._lock:
+            vectors = self.vectors
+            metadata = self.metadata
+            article_index = self.article_index
+            if alpha is not None and self._bm25 is None:
+                self._bm25 = _BM25([
+                    f"{article} {chunk_body}"
+                    for article, chunk_body in zip(self.metadata["article"], self.metadata["chunk_body"])
+                ])
+            bm25 = self._bm25
+
+        if len(vectors) == 0:
+            return []
+
+        scores = vectors @ query_vector
+        if alpha is not None:
+            scores = alpha * _min_max(scores) + (1 - alpha) * _min_max(bm25.scores(query))
+
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        final_response = []
+        for i in top:
+            final_response.append(article_index.get(ArticleIndex.key_of(self._properties(int(i), metadata))))
+
+        return final_response
+
+    def delete(self, title: str = None) -> Dict[str, int]:
+        try:
+            with self._lock:
+                matched = np.array(
+                    [fnmatch.fnmatchcase(document, title) for document in self.metadata["document"]],
+                    dtype=bool
+                )
+                keep = ~matched
+
+                if matched.any():
+                    self._keep(keep)
+                    self.article_index.remove_document(title)
+                    if self.answer_cache is not None:
+                        self.answer_cache.invalidate_documents(title)
+
+            return {
+                "failed": 0,
+                "successful": int(matched.sum()),
+                "matched": int(matched.sum())
+            }
+
+        except Exception as err:
+            print(f"There appeared error deleting objects: {str(err)}")
+            return { }
+
+    def stored_chunks(self, documents: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = np.flatnonzero(np.isin(self.metadata["document"], list(documents)))
+            return {str(self.metadata["uuid"][i]): self._properties(int(i)) for i in rows}
+
+    def delete_ids(self, ids: List[str]) -> int:
+        with self._lock:
+            matched = np.isin(self.metadata["uuid"], ids)
+            if matched.any():
+                self._keep(~matched)
+
+        return int(matched.sum())
+
+    def count(self) -> int:
+        self._refresh()
+        return len(self.metadata["uuid"])
+
+    def close(self) -> None:
+        self.embedding_cache.close()
+        if self.answer_cache is not None:
+            self.answer_cache.close()
@@ -0,0 +1,154 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import time
+import asyncio
+import logging
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+# Mongolian inflects by suffixes, so words are compared by their first letters
+STEM_LENGTH = 5
+
+def _stems(text: str) -> Set[str]:
+    return {token[:STEM_LENGTH] for token in re.findall(r"\w+", text.casefold())}
+
+def query_similarity(first: str, second: str) -> float:
+    """
+    Dice coefficient of the stemmed token sets of two queries, in [0, 1].
+    """
+    first_stems, second_stems = _stems(first), _stems(second)
+    if not first_stems or not second_stems:
+        return 0.0
+
+    return 2 * len(first_stems & second_stems) / (len(first_stems) + len(second_stems))
+
+class Prefetch:
+    """
+    A vector search started on the raw user query of one request.
+    """
+
+    def __init__(self, query: str, args: Dict[str, Any],
+                 call_tool: Callable[[str, Dict[str, Any]], Awaitable[Any]], tool_name: str) -> None:
+        self.query = query
+        self.args = args
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.task = asyncio.create_task(self._run(call_tool, tool_name))
+
+    async def _run(self, call_tool: Callable[[str, Dict[str, Any]], Awaitable[Any]], tool_name: str) -> Any:
+        # set before the awaiting request resumes, unlike a done callback
+        try:
+            return await call_tool(tool_name, self.args)
+        finally:
+            self.finished_at = time.perf_counter()
+
+class SpeculativeRetriever:
+    """
+    Runs the vector search the model is most likely to ask for first at the same
+    time as the first model call. When the model then requests a search close
+    enough to the user query, the prefetched result is used and one serial
+    round trip leaves the critical path.
+    """
+
+    def __init__(self, call_tool: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+                 tool_name: str = "search_vector_database", limit: int = 2,
+                 threshold: float = 0.5) -> None:
+        self.call_tool = call_tool
+        self.tool_name = tool_name
+        self.limit = limit
+        self.threshold = threshold
+
+        self.hits = 0
+        self.misses = 0
+        self.unused = 0
+        self.saved_seconds = 0.0
+
+    def prefetch(self, query: str) -> Prefetch:
+        args = {"query": query, "limit": self.limit}
+        return Prefetch(query, args, self.call_tool, self.tool_name)
+
+    def matches(self, prefetch: Prefetch, tool_name: str, tool_args: Dict[str, Any]) -> bool:
+        if tool_name != self.tool_name:
+            return False
+
+        # other limits or a keyword weighted search return a different result set
+        if tool_args.get("limit", 2) != self.limit or tool_args.get("alpha") is not None:
+            return False
+
+        return query_similarity(prefetch.query, str(tool_args.get("query", ""))) >= self.threshold
+
+    async def resolve(self, prefetch: Prefetch, tool_name: str,
+                      tool_args: Dict[str, Any]) -> Tuple[bool, Any]:
+        """
+        Returns the prefetched result when the requested search matches it.
+        A requested search that does not match cancels the prefetch.
+        Returns:
+            Tuple[bool, Any]: whether the prefetch was used and its tool response
+        """
+        if not self.matches(prefetch, tool_name, tool_args):
+            if tool_name == self.tool_name:
+                self.misses += 1
+                self._cancel(prefetch)
+                logger.info(f"Speculative search missed: {prefetch.query!r} vs {tool_args.get('query')!r}")
+            return False, None
+
+        requested_at = time.perf_counter()
+        try:
+            result = await prefetch.task
+        except Exception as err:
+            self.misses += 1
+            logger.warning(f"Speculative search failed, running the requested one: {err!r}")
+            return False, None
+
+        # the part of the search that overlapped with the model call
+        self.saved_seconds += max(0.0, min(prefetch.finished_at, requested_at) - prefetch.started_at)
+        self.hits += 1
+        logger.info(f"Speculative search hit after waiting {(time.perf_counter() - requested_at) * 1000:.1f} ms")
+        return True, result
+
+    def discard(self, prefetch: Prefetch) -> None:
+        """
+        Drops a prefetch the request never consumed.
+        """
+        self._cancel(prefetch)
+        self.unused += 1
+
+    @staticmethod
+    def _cancel(prefetch: Prefetch) -> None:
+        if not prefetch.task.done():
+            prefetch.task.cancel()
+        elif not prefetch.task.cancelled():
+            # retrieve the exception so that asyncio does not report it as unhandled
+            _ = prefetch.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "unused": self.unused,
+            "saved_seconds": round(self.saved_seconds, 3)
+        }
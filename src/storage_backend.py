@@ -0,0 +1,435 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import uuid
+import time
+import asyncio
+import hashlib
+import requests
+import logging
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Iterator, Iterable, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.answer_cache import AnswerCache
+from src.embedding_cache import EmbeddingCache
+from src.article_index import ArticleIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+# Number of texts per /embed call and number of concurrent /embed calls
+EMBED_BATCH_SIZE = 32
+EMBED_MAX_IN_FLIGHT = 4
+
+# Delays between attempts to connect a backend whose dependencies are still
+# booting, and how long a tool call waits for a backend that is not ready
+WARMUP_RETRY_DELAY = 0.5
+WARMUP_MAX_RETRY_DELAY = 5.0
+WARMUP_WAIT_TIMEOUT = 10.0
+
+# Namespace of the deterministic chunk UUIDs
+CHUNK_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "legalinfo.mn/LawDocuments")
+
+def chunk_uuid(chunk: Dict[str, Any]) -> str:
+    """
+    Stable UUID of a chunk derived from its position in the law, so re-ingesting
+    a document overwrites its chunks instead of duplicating them.
+    """
+    name = "\x00".join([chunk["document"], chunk["chapter"], chunk["article"], str(chunk["order_id"])])
+    return str(uuid.uuid5(CHUNK_NAMESPACE, name))
+
+def content_hash(chunk: Dict[str, Any]) -> str:
+    return hashlib.sha256(chunk["chunk_body"].encode("utf-8")).hexdigest()
+
+def chunk_properties(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "order_id": chunk["order_id"],
+        "document": chunk["document"],
+        "chapter": chunk["chapter"],
+        "article": chunk["article"],
+        "chunk_body": chunk["chunk_body"],
+        "content_hash": content_hash(chunk)
+    }
+
+class StorageBackend(ABC):
+    """
+    Interface of the chunk stores behind the MCP server. Subclasses keep the
+    chunks and their vectors, while embedding goes through the shared /embed
+    client and the query embedding cache implemented here.
+    """
+
+    def __init__(self, embedding_host: str, embedding_cache: Optional[EmbeddingCache] = None) -> None:
+        self.session = requests.Session()
+        self.embedding_url = f"http://{embedding_host}/embed"
+        self.embedding_cache = embedding_cache or EmbeddingCache.from_env()
+        self.article_index: Optional[ArticleIndex] = None
+        self.answer_cache: Optional[AnswerCache] = AnswerCache.from_env()
+
+    def check_embedder(self) -> None:
+        """
+        Raises:
+            ConnectionError: the /embed server did not return a test embedding
+        """
+        test_response = self.encode(["test"], use_cache=False)
+        if test_response[0]:
+            logger.info(f"Sentence Embedding model is available for use.")
+            logger.info(f"Embed dimensions: {len(test_response[0])}")
+        else:
+            raise ConnectionError("EMBEDDING SERVER IS NOT CONNECTED! FIX IT BEFORE FURTHER USE.")
+
+    def encode(self, sentences: List[str], use_cache: bool = True) -> List[List[int]]:
+        """
+        Embeds the sentences, answering the cached ones from the embedding cache
+        and sending only the rest to the embedding server.
+        Args:
+            sentences (List[str]): texts to embed
+            use_cache (bool): whether to consult and fill the embedding cache
+        
+        Returns:
+            List[List[int]]: one vector per sentence
+        """
+
+        if not use_cache:
+            return self._request_embeddings(sentences)
+
+        vectors = [self.embedding_cache.get(sentence) for sentence in sentences]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            response = self._request_embeddings([sentences[i] for i in missing])
+            if not isinstance(response, list):
+                return response
+
+            for i, vector in zip(missing, response):
+                vectors[i] = vector
+                self.embedding_cache.put(sentences[i], vector)
+
+        return vectors
+
+    def _request_embeddings(self, sentences: List[str]) -> List[List[int]]:
+        headers = {"Content-Type": "application/json"}
+        
+        payload = {"inputs": sentences}
+
+        response = self.session.post(
+            self.embedding_url,
+            headers=headers,
+            json=payload
+        )
+
+        return response.json()
+
+    def _embed_batches(self, chunks: List[Dict[str, str]], batch_size: int,
+                       max_in_flight: int) -> Iterator[tuple]:
+        """
+        Embeds the chunk bodies in batches of `batch_size` texts per /embed call,
+        keeping up to `max_in_flight` calls running at once.
+        Args:
+            chunks (List[Dict[str, str]]): chunks prepared by DocumentManager.chunk_articles
+            batch_size (int): number of texts sent in a single /embed request
+            max_in_flight (int): number of concurrent /embed requests
+        
+        Returns:
+            Iterator[tuple]: (chunk batch, vectors) pairs in order of completion
+        """
+
+        batches = [chunks[i:i+batch_size] for i in range(0, len(chunks), batch_size)]
+
+        executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        try:
+            futures = {
+                executor.submit(self.encode, [chunk["chunk_body"] for chunk in batch], False): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # drop the queued batches if the insertion stopped early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def ingest(self, chunks: List[Dict[str, Any]],
+               embed_batch_size: int = EMBED_BATCH_SIZE,
+               max_in_flight: int = EMBED_MAX_IN_FLIGHT) -> Dict[str, int]:
+        """
+        Incrementally brings the stored documents in line with the given chunks.
+        Only the chunks whose content hash changed are embedded and upserted under
+        their deterministic UUIDs, and stored chunks of the same documents that
+        no longer exist are deleted. Unchanged documents cost no embedding calls.
+        Args:
+            chunks (List[Dict[str, Any]]): every chunk of the documents to ingest
+            embed_batch_size (int): number of texts sent in a single /embed request
+            max_in_flight (int): number of concurrent /embed requests
+        
+        Returns:
+            Dict[str, int]: numbers of unchanged, upserted and deleted chunks
+        """
+
+        start_time = time.perf_counter()
+
+        documents = {chunk["document"] for chunk in chunks}
+        stored = self.stored_chunks(documents)
+
+        incoming = {chunk_uuid(chunk): chunk for chunk in chunks}
+        changed = [
+            chunk for chunk_id, chunk in incoming.items()
+            if chunk_id not in stored or stored[chunk_id].get("content_hash") != content_hash(chunk)
+        ]
+        stale = [chunk_id for chunk_id in stored if chunk_id not in incoming]
+
+        upserted = self.insert(changed, embed_batch_size, max_in_flight) if changed else []
+
+        if stale:
+            self.delete_ids(stale)
+            if self.article_index is not None:
+                self.article_index.remove(stored[chunk_id] for chunk_id in stale)
+
+        # `insert` drops the cached answers citing the changed articles, these cite removed ones
+        if self.answer_cache is not None and stale:
+            self.answer_cache.invalidate_articles(ArticleIndex.key_of(stored[chunk_id]) for chunk_id in stale)
+
+        summary = {
+            "unchanged": len(incoming) - len(changed),
+            "upserted": len(upserted),
+            "deleted": len(stale)
+        }
+        logger.info(f"Ingested {len(documents)} document(s) in {time.perf_counter() - start_time:.2f}s: {summary}")
+
+        return summary
+
+    @abstractmethod
+    def stored_chunks(self, documents: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the properties (including `content_hash`) of the stored chunks
+        of the given documents, keyed by their UUIDs.
+        """
+        ...
+
+    @abstractmethod
+    def delete_ids(self, ids: List[str]) -> int:
+        ...
+
+    @abstractmethod
+    def insert(self, chunks: List[Dict[str, str]],
+               embed_batch_size: int = EMBED_BATCH_SIZE,
+               max_in_flight: int = EMBED_MAX_IN_FLIGHT) -> List[str]:
+        ...
+
+    @abstractmethod
+    def read(self, query: str, limit: int = 2, alpha: Optional[float] = None) -> List[str]:
+        ...
+
+    @abstractmethod
+    def delete(self, title: str = None) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    def build_index(self) -> ArticleIndex:
+        """
+        (Re)loads the in-memory article index used for context expansion in `read`.
+        """
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+class ThreadedBackend:
+    """
+    Async facade with the interface of AsyncDatabaseManager over a synchronous
+    StorageBackend. The backend is built in `connect` and its blocking calls
+    run in worker threads, off the event loop.
+    """
+
+    def __init__(self, backend_factory: Callable[[], StorageBackend]) -> None:
+        self.backend_factory = backend_factory
+        self.backend: Optional[StorageBackend] = None
+        self.startup_timings: Dict[str, float] = {}
+
+    async def connect(self) -> None:
+        start_time = time.perf_counter()
+        self.backend = await asyncio.to_thread(self.backend_factory)
+        self.startup_timings["backend"] = time.perf_counter() - start_time
+
+    async def build_index(self) -> ArticleIndex:
+        # the synchronous backends build their index while they are constructed
+        if self.backend.article_index is None:
+            return await asyncio.to_thread(self.backend.build_index)
+        return self.backend.article_index
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.close)
+
+    async def encode(self, sentences: List[str], use_cache: bool = True) -> List[List[int]]:
+        return await asyncio.to_thread(self.backend.encode, sentences, use_cache)
+
+    async def insert(self, chunks: List[Dict[str, str]],
+                     embed_batch_size: int = EMBED_BATCH_SIZE,
+                     max_in_flight: int = EMBED_MAX_IN_FLIGHT) -> List[str]:
+        return await asyncio.to_thread(self.backend.insert, chunks, embed_batch_size, max_in_flight)
+
+    async def read(self, query: str, limit: int = 2, alpha: Optional[float] = None) -> List[str]:
+        return await asyncio.to_thread(self.backend.read, query, limit, alpha)
+
+    async def delete(self, title: str = None) -> Dict[str, int]:
+        return await asyncio.to_thread(self.backend.delete, title)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self.backend.count)
+
+class BackendNotReady(ConnectionError):
+    """
+    Raised by BackendWarmUp when the backend is not connected in time.
+    """
+
+class BackendWarmUp:
+    """
+    Builds and connects an async backend (AsyncDatabaseManager or ThreadedBackend)
+    in the background, so that the MCP server answers its handshake at once instead
+    of after the database and /embed round trips. Dependencies that are still
+    booting are retried with growing delays and reported by `readiness` rather
+    than ending the process. The article index is loaded once the backend is
+    ready, reads expand their context from the database until then.
+    """
+
+    def __init__(self, backend_factory: Callable[[], Any],
+                 retry_delay: float = WARMUP_RETRY_DELAY,
+                 max_retry_delay: float = WARMUP_MAX_RETRY_DELAY) -> None:
+        self.backend_factory = backend_factory
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.backend = None
+        self.state = "idle"
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        self._ready = asyncio.Event()
+        self._started_at = time.perf_counter()
+        self.state = "starting"
+        self._task = asyncio.create_task(self._run(), name="backend-warm-up")
+
+    async def _run(self) -> None:
+        delay = self.retry_delay
+        while True:
+            self.attempts += 1
+            try:
+                if self.backend is None:
+                    # the backend modules (e.g. the weaviate client) are imported off the event loop
+                    self.backend = await asyncio.to_thread(self.backend_factory)
+                    self.timings["construct"] = time.perf_counter() - self._started_at
+
+                await self.backend.connect()
+                break
+            except Exception as err:
+                self.last_error = f"{type(err).__name__}: {err}"
+                logger.warning(f"Backend is not reachable yet (attempt {self.attempts}), "
+                               f"retrying in {delay:.1f}s: {self.last_error}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+        self.timings.update(self.backend.startup_timings)
+        self.timings["ready"] = time.perf_counter() - self._started_at
+        self.state = "ready"
+        self._ready.set()
+        logger.info(f"Backend is ready after {self.timings['ready']:.2f}s and {self.attempts} attempt(s)")
+
+        try:
+            index_start = time.perf_counter()
+            await self.backend.build_index()
+            self.timings["index"] = time.perf_counter() - index_start
+        except Exception as err:
+            logger.warning(f"Article index could not be built, reads fetch the context instead: {err!r}")
+
+        logger.info("Backend startup timings: " + ", ".join(
+            f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.timings.items()
+        ))
+
+    async def get(self, timeout: float = WARMUP_WAIT_TIMEOUT) -> Any:
+        """
+        Returns the connected backend, waiting up to `timeout` seconds for it.
+        Raises:
+            BackendNotReady: the backend is still starting, with the readiness report
+        """
+        if self.state != "ready":
+            try:
+                await asyncio.wait_for(asyncio.shield(self._ready.wait()), timeout=timeout)
+            except asyncio.TimeoutError:
+                readiness = self.readiness()
+                raise BackendNotReady(
+                    f"The database is still starting up ({readiness['attempts']} connection attempts "
+                    f"in {readiness['uptime']:.0f}s, last error: {readiness['last_error']}). Try again shortly."
+                ) from None
+
+        return self.backend
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "uptime": time.perf_counter() - self._started_at if self._started_at else 0.0,
+            "timings": {name: round(seconds, 3) for name, seconds in self.timings.items()}
+        }
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        if self.backend is not None:
+            try:
+                await self.backend.close()
+            except Exception as err:
+                logger.warning(f"Backend closed with: {err!r}")
+        self.state = "idle"
+
+def create_backend(embedding_host: str) -> StorageBackend:
+    """
+    Builds the synchronous backend named by the VECTOR_BACKEND env variable:
+    `weaviate` (default), in the WEAVIATE_COLLECTION collection, or `numpy`,
+    stored under NUMPY_STORE_PATH.
+    """
+    backend = os.getenv("VECTOR_BACKEND", "weaviate").lower()
+
+    if backend == "numpy":
+        from src.numpy_backend import NumpyDatabaseManager
+        return NumpyDatabaseManager(embedding_host, os.getenv("NUMPY_STORE_PATH", "vector_store"))
+
+    from src.database_management import DatabaseManager
+    return DatabaseManager(embedding_host, collection_name=os.getenv("WEAVIATE_COLLECTION", "LawDocuments"))
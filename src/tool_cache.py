@@ -0,0 +1,132 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import time
+import hashlib
+import logging
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+# the law texts only change on re-ingestion, web results go stale quickly
+DEFAULT_TOOL_TTLS = {
+    "search_vector_database": 3600.0,
+    "count_collection_vectors": 60.0
+}
+DEFAULT_TTL = 120.0
+
+class ToolResultCache:
+    """
+    Bounded LRU of tool responses keyed on the server, the tool name and the
+    canonicalized arguments. Every entry expires after its tool's TTL, so
+    results of cheap and stable tools live much longer than web searches.
+    """
+
+    def __init__(self, max_size: int = 512, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_TTL) -> None:
+        self.max_size = max_size
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+        # key to (expiry time, response)
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    @staticmethod
+    def parse_ttls(spec: str) -> Dict[str, float]:
+        """
+        Parses per-tool TTLs written as "tool=seconds,tool=seconds".
+        """
+        ttls = {}
+        for item in spec.split(","):
+            if "=" in item:
+                name, seconds = item.split("=", 1)
+                ttls[name.strip()] = float(seconds)
+
+        return ttls
+
+    @staticmethod
+    def canonical_args(args: Dict[str, Any]) -> Dict[str, Any]:
+        # unset optional arguments mean the tool default, same as leaving them out
+        return {
+            name: value.strip() if isinstance(value, str) else value
+            for name, value in args.items() if value is not None
+        }
+
+    def key(self, server_name: str, tool_name: str, args: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            [server_name, tool_name, self.canonical_args(args)],
+            sort_keys=True, ensure_ascii=False, separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: str, tool_name: str, response: Any) -> None:
+        ttl = self.ttl(tool_name)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "size": len(self._entries)
+        }
@@ -21,24 +21,71 @@
 # SOFTWARE.
 
 import os
+import sys
+import json
 import logging
 
 from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
-from database_management import DatabaseManager
+from typing import AsyncIterator, Optional
+from contextlib import asynccontextmanager
+from mcp.server.fastmcp import FastMCP, Context
+
+# the server is spawned as `python src/weaviate_server.py`, so the repository
+# root has to be importable for the `src.` package imports to resolve
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage_backend import BackendWarmUp
+from utils.telemetry import telemetry, SPAN_KIND_SERVER
 
 load_dotenv()
 
+# the metric names of the server differ from the agent's, so that they can be served together
+telemetry.configure(service_name="weaviate_dbms", namespace="direktiv_mcp")
+
 embedding_host = os.getenv("EMBEDDING_SERVER")
 
-weaviate_mcp = FastMCP("weaviate_dbms")
-dbms = DatabaseManager(embedding_host)
+def build_backend():
+    """
+    Builds the unconnected backend. It runs in a worker thread during the
+    warm-up, so the heavy client modules are not imported before the MCP
+    handshake is answered.
+    """
+    # VECTOR_BACKEND=numpy serves the embedded NumPy store instead of Weaviate
+    if os.getenv("VECTOR_BACKEND", "weaviate").lower() == "weaviate":
+        from src.database_management import AsyncDatabaseManager
+        return AsyncDatabaseManager(embedding_host, collection_name=os.getenv("WEAVIATE_COLLECTION", "LawDocuments"))
+
+    from src.storage_backend import ThreadedBackend, create_backend
+    return ThreadedBackend(lambda: create_backend(embedding_host))
+
+warm_up = BackendWarmUp(build_backend)
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """
+    Starts connecting the async Weaviate and /embed clients in the background on
+    the server's event loop, and closes them on shutdown. Tool calls wait for the
+    connection and report the readiness when it is not established in time.
+    """
+    warm_up.start()
+    try:
+        yield
+    finally:
+        await warm_up.close()
+        telemetry.flush()
+
+weaviate_mcp = FastMCP("weaviate_dbms", lifespan=lifespan)
+
+def _traceparent(ctx: Context) -> Optional[str]:
+    # the agent's trace context arrives in the request metadata
+    meta = ctx.request_context.meta
+    return getattr(meta, "traceparent", None) if meta is not None else None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
 
 @weaviate_mcp.tool()
-async def search_vector_database(query: str, limit: int = 2) -> str:
+async def search_vector_database(ctx: Context, query: str, limit: int = 2, alpha: Optional[float] = None) -> str:
     """
     Searches the Weaviate vector database collection pertaining 
     to the application for response document chunks by passing the 
@@ -47,9 +94,23 @@ async def search_vector_database(query: str, limit: int = 2) -> str:
     the nearest-neighboring document vectors in the collection. The
     identified document chunks are concatenated into a single string
     to be returned.
+
+    Optionally pass `alpha` between 0 and 1 to run a hybrid search that
+    also matches the exact words of the query (keyword search) against
+    the article texts and names. Use it, e.g. with 0.5, when the query
+    names an exact article number such as "8.8" or "12 дугаар зүйл" or
+    a law title. Lower values favor exact keyword matches, 1 is equal
+    to the plain vector search used when `alpha` is omitted.
     """
 
-    db_response = dbms.read(query, limit)
+    if alpha is not None:
+        alpha = min(max(alpha, 0.0), 1.0)
+
+    with telemetry.span("mcp.tool.search_vector_database", parent=_traceparent(ctx), kind=SPAN_KIND_SERVER,
+                        limit=limit, hybrid=alpha is not None) as span:
+        dbms = await warm_up.get()
+        db_response = await dbms.read(query, limit, alpha)
+        span.set_attribute("hits", len(db_response))
 
     if len(db_response) > 0:
         str_repr = "\n".join(db_response)
@@ -59,14 +120,30 @@ async def search_vector_database(query: str, limit: int = 2) -> str:
     return f"No response has been found for: `{query}`."
 
 @weaviate_mcp.tool()
-async def count_collection_vectors() -> int:
+async def count_collection_vectors(ctx: Context) -> int:
     """
     Counts the number of vectors present in the Weaviate database
     collection. No need to specify the collection as it has been 
     configured a priori.
     """
-    return dbms.count()
+    with telemetry.span("mcp.tool.count_collection_vectors", parent=_traceparent(ctx), kind=SPAN_KIND_SERVER):
+        dbms = await warm_up.get()
+        return await dbms.count()
+
+@weaviate_mcp.resource("readiness://weaviate_dbms", mime_type="application/json")
+async def readiness() -> str:
+    """
+    Startup state of the database backend: connection attempts, the last
+    error and the duration of each startup step.
+    """
+    return json.dumps(warm_up.readiness())
+
+@weaviate_mcp.resource("metrics://weaviate_dbms", mime_type="text/plain")
+async def metrics() -> str:
+    """
+    Prometheus text of the server's stage latencies, empty while telemetry is disabled.
+    """
+    return telemetry.prometheus_text()
 
 if __name__ == '__main__':
-    weaviate_mcp.run(transport="stdio")
-    dbms.client.close()
\ No newline at end of file
+    weaviate_mcp.run(transport="stdio")
\ No newline at end of file
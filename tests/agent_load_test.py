@@ -0,0 +1,242 @@
+# Run from the repository root: python -m tests.agent_load_test --concurrency 8
+#
+# End-to-end load test of the ReAct loop in StdioClient.handle_request without
+# real model calls. The model is tests/mock_model_server.py streaming scripted
+# decisions, the vector database MCP server runs on the NumPy store filled from
+# docs/ and the /embed server is tests/fake_embedding_server.py. The recorded
+# questions are replayed at the chosen concurrency, and sessions/sec, turns per
+# session, time to first token, time to the first message text and end-to-end
+# latency percentiles are reported and written as JSON.
+
+import os
+import sys
+import json
+import time
+import shlex
+import socket
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import httpx
+
+from datetime import datetime, timezone
+from openai import AsyncOpenAI
+
+from tests.retrieval_benchmark import FILEPATH, percentiles, git_commit, compare
+from src.mcp_client import StdioClient
+from src.tool_cache import ToolResultCache
+from utils.model_management import RequestScheduler
+from utils.document_management import DocumentManager
+
+QUESTIONS_PATH = "tests/load_questions.txt"
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def spawn(module, port, *options):
+    return subprocess.Popen([sys.executable, "-m", module, "--port", str(port), *options],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_for(url, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            httpx.post(url, json={"inputs": ["test"]}, timeout=1.0) if url.endswith("/embed") else httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} did not start within {timeout:.0f}s")
+
+def load_questions(path):
+    with open(path, encoding="utf-8") as file:
+        lines = [line.strip() for line in file if line.strip()]
+
+    # plain lines or JSON lines with a "query" field
+    return [json.loads(line)["query"] if line.startswith("{") else line for line in lines]
+
+async def run_session(mcp_client, query):
+    start_time = time.perf_counter()
+    session = {"ttft": None, "first_message": None, "turns": 0, "tool_calls": 0, "status": "completed"}
+
+    def on_event(event, data):
+        if event == "message" and session["first_message"] is None:
+            # the first character of `message_to_user`, after the tool turns and their round trips
+            session["first_message"] = time.perf_counter() - start_time
+        elif event == "tools":
+            session["turns"] += 1
+            session["tool_calls"] += len(data["names"])
+        elif event == "answer":
+            session["turns"] += 1
+        elif event == "error":
+            session["status"] = "error"
+
+    context = [
+        { "role" : "system" , "content" : mcp_client.system },
+        { "role" : "user", "content": query }
+    ]
+    try:
+        step_times = await mcp_client.handle_request(context, on_event)
+        # the first step starts with the session, the client has no answer cache here
+        if step_times and step_times[0]["first_token"] is not None:
+            session["ttft"] = step_times[0]["first_token"]
+    except Exception as err:
+        session["status"] = f"failed: {str(err)}"
+
+    session["latency"] = time.perf_counter() - start_time
+    return session
+
+async def run(args, questions, store_path, embedding_host, model_url, log_path):
+    mcp_client = StdioClient(
+        "mock-model",
+        "mock",
+        # every session pays for its tool calls
+        tool_cache=ToolResultCache(ttls={}, default_ttl=0),
+        scheduler=RequestScheduler(max_concurrency=args.llm_concurrency)
+    )
+    mcp_client.model_client = AsyncOpenAI(api_key="mock", base_url=model_url)
+
+    server_env = {
+        **os.environ,
+        "VECTOR_BACKEND": "numpy",
+        "NUMPY_STORE_PATH": store_path,
+        "EMBEDDING_SERVER": embedding_host,
+        "ANSWER_CACHE_PATH": ""
+    }
+    server_command = f"exec {shlex.quote(sys.executable)} src/weaviate_server.py 2>>{shlex.quote(log_path)}"
+
+    try:
+        await mcp_client.connect_to_servers({
+            "weaviate_vector_database": {
+                "command": "sh",
+                "args": ["-c", server_command],
+                "transport": "stdio",
+                "env": server_env
+            }
+        })
+        # waits for the server's backend warm-up
+        await mcp_client.call_tool("count_collection_vectors", {})
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        queries = [questions[i % len(questions)] for i in range(args.sessions)]
+
+        async def limited(query):
+            async with semaphore:
+                return await run_session(mcp_client, query)
+
+        start_time = time.perf_counter()
+        sessions = await asyncio.gather(*(limited(query) for query in queries))
+        elapsed = time.perf_counter() - start_time
+
+        return sessions, elapsed, mcp_client.scheduler.stats()
+    finally:
+        await mcp_client.close()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="End-to-end agent load test against a mock model server.")
+    parser.add_argument("--questions", default=QUESTIONS_PATH, help="one question per line, or JSON lines with `query`")
+    parser.add_argument("--concurrency", type=int, default=8, help="sessions running at once")
+    parser.add_argument("--sessions", type=int, default=None, help="sessions in total (default: one per question)")
+    parser.add_argument("--script", default=None, help="JSON file of scripted model turns")
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="mock model delay before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="mock model streaming rate")
+    parser.add_argument("--chars-per-token", type=int, default=4)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-concurrency", type=int, default=32, help="model calls streaming at once")
+    parser.add_argument("--output", default="agent_load_test.json")
+    parser.add_argument("--compare", default=None, help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    if args.sessions is None:
+        args.sessions = len(questions)
+
+    # the per-request agent logs would drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+
+    work_path = tempfile.mkdtemp(prefix="agent_load_test_")
+    store_path = os.path.join(work_path, "vector_store")
+    log_path = os.path.join(work_path, "mcp_server.log")
+
+    embed_port, model_port = free_port(), free_port()
+    model_options = ["--ttft-ms", str(args.ttft_ms), "--tokens-per-sec", str(args.tokens_per_sec),
+                     "--chars-per-token", str(args.chars_per_token)]
+    if args.script:
+        model_options += ["--script", args.script]
+
+    processes = [
+        spawn("tests.fake_embedding_server", embed_port, "--latency-ms", str(args.embed_latency_ms)),
+        spawn("tests.mock_model_server", model_port, *model_options)
+    ]
+    try:
+        embedding_host = f"127.0.0.1:{embed_port}"
+        wait_for(f"http://{embedding_host}/embed", processes[0])
+        wait_for(f"http://127.0.0.1:{model_port}/stats", processes[1])
+
+        from src.numpy_backend import NumpyDatabaseManager
+        dbms = NumpyDatabaseManager(embedding_host, store_path)
+        dbms.ingest(DocumentManager.chunk_articles(DocumentManager.iter_articles(FILEPATH), 800))
+        dbms.close()
+
+        sessions, elapsed, scheduler_stats = asyncio.run(
+            run(args, questions, store_path, embedding_host, f"http://127.0.0.1:{model_port}/v1", log_path)
+        )
+        model_stats = httpx.get(f"http://127.0.0.1:{model_port}/stats").json()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    completed = [session for session in sessions if session["status"] == "completed"]
+    ttfts = [session["ttft"] for session in completed if session["ttft"] is not None]
+    first_messages = [session["first_message"] for session in completed if session["first_message"] is not None]
+
+    results = {
+        "sessions": len(sessions),
+        "completed": len(completed),
+        "seconds": elapsed,
+        "sessions_per_sec": len(completed) / elapsed,
+        "turns_per_session": sum(session["turns"] for session in completed) / max(len(completed), 1),
+        "tool_calls_per_session": sum(session["tool_calls"] for session in completed) / max(len(completed), 1),
+        "ttft": percentiles(ttfts) if ttfts else {},
+        "first_message": percentiles(first_messages) if first_messages else {},
+        "latency": percentiles([session["latency"] for session in completed]) if completed else {},
+        "model_requests": model_stats["requests"],
+        "model_max_in_flight": model_stats["max_in_flight"],
+        "scheduler_mean_wait_ms": scheduler_stats["mean_wait_ms"]
+    }
+
+    print(f"{len(completed)}/{len(sessions)} sessions completed in {elapsed:.2f}s at concurrency {args.concurrency}: "
+          f"{results['sessions_per_sec']:.2f} sessions/sec, {results['turns_per_session']:.2f} turns/session")
+    for name in ("ttft", "first_message", "latency"):
+        if results[name]:
+            print(f"{name:<13} p50 {results[name]['p50_ms']:8.1f} ms, p95 {results[name]['p95_ms']:8.1f} ms, "
+                  f"p99 {results[name]['p99_ms']:8.1f} ms")
+    for session in sessions:
+        if session["status"] != "completed":
+            print(f"Session {session['status']}")
+    print(f"MCP server log: {log_path}")
+
+    report = {
+        "benchmark": "agent_load",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,75 @@
+# Run from the repository root: python -m tests.async_answer_invalidation
+#
+# Checks that writes through AsyncDatabaseManager drop the cached answers citing
+# the written articles, as the MCP server does them. The /embed server is
+# tests/fake_embedding_server.py and the Weaviate collection is replaced by an
+# in-memory stand-in, so neither a GPU nor a Weaviate instance is needed.
+
+import os
+import types
+import asyncio
+import tempfile
+
+from src.answer_cache import AnswerCache
+from src.database_management import AsyncDatabaseManager
+from tests.fake_embedding_server import FakeEmbeddingServer, embed_text
+
+DOCUMENT = "Хөдөлмөрийн тухай хууль.docx"
+CHAPTER = "НЭГДҮГЭЭР БҮЛЭГ"
+
+class InMemoryData:
+    """
+    The part of a Weaviate async collection's `data` the manager writes through.
+    """
+
+    def __init__(self) -> None:
+        self.objects = {}
+
+    async def insert_many(self, objects):
+        for obj in objects:
+            self.objects[obj.uuid] = obj.properties
+        return types.SimpleNamespace(
+            has_errors=False, errors={}, uuids={i: obj.uuid for i, obj in enumerate(objects)}
+        )
+
+    async def delete_many(self, where):
+        matches = len(self.objects)
+        self.objects.clear()
+        return types.SimpleNamespace(failed=0, successful=matches, matches=matches)
+
+def chunk(article: str, body: str) -> dict:
+    return {"order_id": 0, "document": DOCUMENT, "chapter": CHAPTER, "article": article, "chunk_body": body}
+
+def cache_answer(cache: AnswerCache, query: str, article: str) -> None:
+    cache.store(query, embed_text(query), f"Answer citing {article}", [(DOCUMENT, CHAPTER, article)])
+
+async def main(embedding_host: str, cache_path: str) -> None:
+    dbms = AsyncDatabaseManager(embedding_host)
+    dbms.collection = types.SimpleNamespace(data=InMemoryData())
+    dbms.answer_cache = AnswerCache(cache_path)
+
+    try:
+        cache_answer(dbms.answer_cache, "Ажилтныг хэзээ ажлаас халах вэ?", "1 дүгээр зүйл")
+        cache_answer(dbms.answer_cache, "Ээлжийн амралт хэдэн өдөр вэ?", "2 дугаар зүйл")
+
+        await dbms.insert([chunk("1 дүгээр зүйл", "Хөдөлмөрийн гэрээг цуцлах үндэслэл шинэчлэгдсэн.")])
+        assert dbms.answer_cache.lookup(embed_text("Ажилтныг хэзээ ажлаас халах вэ?")) is None, \
+            "the answer citing the inserted article is still cached"
+        assert dbms.answer_cache.lookup(embed_text("Ээлжийн амралт хэдэн өдөр вэ?")) is not None, \
+            "the answer citing an untouched article was dropped"
+        print("insert: dropped the answer citing the written article, kept the other one")
+
+        await dbms.delete(DOCUMENT)
+        assert dbms.answer_cache.stats()["size"] == 0, "answers citing the deleted document are still cached"
+        print("delete: dropped every answer citing the deleted document")
+    finally:
+        await dbms.close()
+
+if __name__ == '__main__':
+
+    embedder = FakeEmbeddingServer().start()
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            asyncio.run(main(embedder.host, os.path.join(directory, "answers.sqlite")))
+        finally:
+            embedder.stop()
@@ -0,0 +1,123 @@
+# Run from the repository root: python -m tests.fake_embedding_server --port 8080
+#
+# Local stand-in for the BGE-m3 /embed server. Texts are embedded by hashing
+# their words and word stems into a fixed number of dimensions, so the vectors
+# are deterministic across runs and texts sharing words stay close to each other.
+
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+
+import numpy as np
+
+from typing import List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# bge-m3 dense embedding size
+DIMENSIONS = 1024
+
+def embed_text(text: str, dimensions: int = DIMENSIONS) -> List[float]:
+    vector = np.zeros(dimensions, dtype=np.float32)
+
+    words = re.findall(r"\w+", text.casefold())
+    for feature in words + [word[:5] for word in words if len(word) > 5]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        # texts without words still get a stable vector
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=4).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+        norm = np.linalg.norm(vector)
+
+    return (vector / norm).tolist()
+
+class FakeEmbeddingServer:
+    """
+    Serves POST /embed with {"inputs": str | List[str]} like the embedding server,
+    optionally sleeping `latency` seconds per request to stand in for the GPU.
+    """
+
+    def __init__(self, dimensions: int = DIMENSIONS, latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0) -> None:
+        self.dimensions = dimensions
+        self.latency = latency
+        self.requests = 0
+        self.texts = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body are separate writes on a kept-alive connection
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                inputs = body["inputs"]
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+
+                if server.latency:
+                    time.sleep(server.latency)
+                server.requests += 1
+                server.texts += len(inputs)
+
+                data = json.dumps([embed_text(text, server.dimensions) for text in inputs]).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        # the value EMBEDDING_SERVER expects
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "FakeEmbeddingServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeEmbeddingServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Deterministic stand-in for the /embed server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--dimensions", type=int, default=DIMENSIONS)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added delay of every request")
+    args = parser.parse_args()
+
+    server = FakeEmbeddingServer(args.dimensions, args.latency_ms / 1000, args.host, args.port)
+    print(f"Fake embedding server listening on http://{server.host}/embed")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
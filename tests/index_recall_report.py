@@ -0,0 +1,226 @@
+# Run from the repository root: python -m tests.index_recall_report
+#
+# Recall against latency of the Weaviate vector index under several HNSW and
+# compression settings. The chunks of the bundled law and the questions of
+# tests/golden_queries.jsonl are embedded once, then every configuration gets a
+# fresh scratch collection holding the same vectors and is queried at each `ef`.
+# recall@k is the overlap with the exact (brute-force) top k, and the golden hit
+# rate is the share of questions whose expected article is among the k hits.
+# `--distractors` adds noisy copies of the chunk vectors so that the index is
+# searched at a realistic size. Needs a local Weaviate; the /embed server is
+# tests/fake_embedding_server.py unless `--embedding-server` is given.
+
+import sys
+import json
+import time
+import uuid
+import platform
+import argparse
+
+import httpx
+import numpy as np
+import weaviate
+
+from datetime import datetime, timezone
+from weaviate.classes.config import Reconfigure
+from weaviate.classes.query import MetadataQuery
+
+from src.database_management import VectorIndexSettings, LAW_DOCUMENT_PROPERTIES
+from utils.document_management import DocumentManager
+from tests.fake_embedding_server import FakeEmbeddingServer
+from tests.retrieval_benchmark import FILEPATH, percentiles, git_commit, compare
+
+GOLDEN_PATH = "tests/golden_queries.jsonl"
+
+DEFAULT_CONFIGS = [
+    "float32:quantizer=none",
+    "pq:quantizer=pq,pq_segments=128,pq_training_limit=1000",
+    "bq:quantizer=bq,rescore_limit=200"
+]
+
+def parse_config(text):
+    # `name:key=value,key=value` with the keyword arguments of VectorIndexSettings
+    name, _, options = text.partition(":")
+    kwargs = {}
+    for option in filter(None, options.split(",")):
+        key, value = option.split("=", 1)
+        kwargs[key] = value if key == "quantizer" else int(value)
+    return name, VectorIndexSettings(**kwargs)
+
+def bytes_per_vector(settings, dimensions):
+    if settings.quantizer == "pq":
+        # one byte per segment with the default 256 centroids, unknown when Weaviate picks the segments
+        return settings.pq_segments
+    if settings.quantizer == "bq":
+        return dimensions // 8
+    return dimensions * 4
+
+def embed(embedding_host, texts, batch_size=32):
+    vectors = []
+    with httpx.Client(timeout=60.0) as client:
+        for i in range(0, len(texts), batch_size):
+            response = client.post(f"http://{embedding_host}/embed", json={"inputs": texts[i:i+batch_size]})
+            vectors.extend(response.json())
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def add_distractors(vectors, count, noise, seed=0):
+    rng = np.random.default_rng(seed)
+    sources = vectors[rng.integers(0, len(vectors), count)]
+    distractors = sources + noise * rng.standard_normal(sources.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return distractors / np.linalg.norm(distractors, axis=1, keepdims=True)
+
+def load_collection(client, name, settings, objects, vectors):
+    if client.collections.exists(name):
+        client.collections.delete(name)
+
+    collection = client.collections.create(
+        name=name,
+        properties=LAW_DOCUMENT_PROPERTIES,
+        vector_index_config=settings.create_config()
+    )
+
+    start_time = time.perf_counter()
+    with collection.batch.fixed_size(batch_size=200) as batch:
+        for (object_id, properties), vector in zip(objects, vectors):
+            batch.add_object(properties=properties, uuid=object_id, vector=vector.tolist())
+
+    if collection.batch.failed_objects:
+        raise RuntimeError(f"{len(collection.batch.failed_objects)} objects failed to load into {name}")
+
+    return collection, time.perf_counter() - start_time
+
+def run_queries(collection, query_vectors, exact, golden, limit):
+    timings, recalls, hits = [], [], 0
+
+    for query_vector, exact_ids, expected in zip(query_vectors, exact, golden):
+        start_time = time.perf_counter()
+        response = collection.query.near_vector(
+            near_vector=query_vector.tolist(),
+            limit=limit,
+            return_properties=["article"],
+            return_metadata=MetadataQuery(distance=True)
+        )
+        timings.append(time.perf_counter() - start_time)
+
+        found_ids = {str(obj.uuid) for obj in response.objects}
+        recalls.append(len(found_ids & exact_ids) / len(exact_ids))
+        hits += any(obj.properties["article"].strip() == expected for obj in response.objects)
+
+    return {
+        f"recall_at_{limit}": sum(recalls) / len(recalls),
+        f"golden_hit_rate_at_{limit}": hits / len(golden),
+        **percentiles(timings)
+    }
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Recall and latency of the vector index under HNSW and compression settings.")
+    parser.add_argument("--document", default=FILEPATH)
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="JSON lines with `query` and the expected `article`")
+    parser.add_argument("--config", action="append", default=None,
+                        help=f"`name:key=value,...` of VectorIndexSettings, repeatable (default: {DEFAULT_CONFIGS})")
+    parser.add_argument("--ef", default="16,32,64,128,256", help="comma separated query-time `ef` values")
+    parser.add_argument("--limit", type=int, default=5, help="k of recall@k")
+    parser.add_argument("--distractors", type=int, default=5000, help="noisy copies of the chunk vectors added")
+    parser.add_argument("--noise", type=float, default=0.8, help="scale of the noise added to the distractors")
+    parser.add_argument("--repeats", type=int, default=5, help="passes over the golden queries per `ef`")
+    parser.add_argument("--collection", default="LawDocumentsRecall",
+                        help="Weaviate collection created and deleted for every configuration")
+    parser.add_argument("--embedding-server", default=None, help="host:port of a real /embed server")
+    parser.add_argument("--output", default="index_recall_report.json")
+    parser.add_argument("--compare", default=None, help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    configs = [parse_config(text) for text in (args.config or DEFAULT_CONFIGS)]
+    ef_values = [int(ef) for ef in args.ef.split(",")]
+
+    with open(args.golden, encoding="utf-8") as file:
+        golden = [json.loads(line) for line in file if line.strip()]
+
+    chunks = DocumentManager.chunk_articles(DocumentManager.iter_articles(args.document), args.chunk_size)
+
+    embedder = None
+    embedding_host = args.embedding_server
+    if embedding_host is None:
+        embedder = FakeEmbeddingServer().start()
+        embedding_host = embedder.host
+
+    try:
+        chunk_vectors = embed(embedding_host, [chunk["chunk_body"] for chunk in chunks])
+        query_vectors = embed(embedding_host, [item["query"] for item in golden])
+    finally:
+        if embedder is not None:
+            embedder.stop()
+
+    distractor_vectors = add_distractors(chunk_vectors, args.distractors, args.noise)
+    vectors = np.vstack([chunk_vectors, distractor_vectors])
+    dimensions = vectors.shape[1]
+
+    objects = [(str(uuid.uuid5(uuid.NAMESPACE_URL, f"recall/{i}")), {
+        "order_id": chunk["order_id"], "document": chunk["document"], "chapter": chunk["chapter"],
+        "article": chunk["article"], "chunk_body": chunk["chunk_body"]
+    }) for i, chunk in enumerate(chunks)]
+    objects += [(str(uuid.uuid5(uuid.NAMESPACE_URL, f"recall/{len(chunks) + i}")), {
+        "order_id": 0, "document": "distractor", "chapter": "", "article": "", "chunk_body": ""
+    }) for i in range(args.distractors)]
+
+    # the exact top k of every query by cosine similarity
+    similarities = query_vectors @ vectors.T
+    exact = [{objects[i][0] for i in np.argsort(-row)[:args.limit]} for row in similarities]
+    exact_hits = sum(any(objects[i][1]["article"].strip() == item["article"] for i in np.argsort(-row)[:args.limit])
+                     for row, item in zip(similarities, golden))
+
+    expected = [item["article"] for item in golden]
+    query_vectors = np.tile(query_vectors, (args.repeats, 1))
+    exact = exact * args.repeats
+    expected = expected * args.repeats
+
+    print(f"{len(chunks)} chunks + {args.distractors} distractors, {len(golden)} golden queries, "
+          f"exact golden hit rate@{args.limit} {exact_hits / len(golden):.3f}")
+    print(f"{'config':<12} {'ef':>5} {'recall':>8} {'golden':>8} {'p50 ms':>8} {'p95 ms':>8} {'bytes/vec':>10}")
+
+    results = {"exact": {f"golden_hit_rate_at_{args.limit}": exact_hits / len(golden)}}
+
+    client = weaviate.connect_to_local()
+    try:
+        for name, settings in configs:
+            collection, load_seconds = load_collection(client, args.collection, settings, objects, vectors)
+            results[name] = {
+                "settings": settings.as_dict(),
+                "load_seconds": load_seconds,
+                "bytes_per_vector": bytes_per_vector(settings, dimensions)
+            }
+
+            for ef in ef_values:
+                collection.config.update(vector_index_config=Reconfigure.VectorIndex.hnsw(ef=ef))
+                # one unmeasured pass after every change of ef
+                run_queries(collection, query_vectors[:len(golden)], exact[:len(golden)], expected[:len(golden)], args.limit)
+
+                stats = run_queries(collection, query_vectors, exact, expected, args.limit)
+                results[name][f"ef_{ef}"] = stats
+                print(f"{name:<12} {ef:>5} {stats[f'recall_at_{args.limit}']:>8.3f} "
+                      f"{stats[f'golden_hit_rate_at_{args.limit}']:>8.3f} {stats['p50_ms']:>8.2f} "
+                      f"{stats['p95_ms']:>8.2f} {str(results[name]['bytes_per_vector']):>10}")
+
+            client.collections.delete(args.collection)
+    finally:
+        client.close()
+
+    report = {
+        "benchmark": "index_recall",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,188 @@
+# Run from the repository root: python -m tests.mock_model_server --port 8100
+#
+# Local stand-in for an OpenAI-compatible model host. POST /v1/chat/completions
+# streams scripted agent decisions instead of generated text, at a configurable
+# time to first token and token rate, so the ReAct loop can be load-tested
+# without paying for model calls. Point the agent at it with
+# OPENAI_BASE_URL=http://127.0.0.1:8100/v1.
+#
+# The script is a JSON list of turns, the n-th model call of a session gets the
+# n-th turn (the last one repeats). `{query}` in string values is replaced by the
+# user question, e.g.
+#   [{"decision": "tool", "tools": [{"name": "search_vector_database", "args": {"query": "{query}"}}]},
+#    {"decision": "answer", "message_to_user": "..."}]
+
+import json
+import time
+import uuid
+import asyncio
+import argparse
+
+import uvicorn
+
+from typing import Any, AsyncIterator, Dict, List
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+DEFAULT_SCRIPT = [
+    {
+        "rationale": "The question is about a legal matter, I will search the vector database.",
+        "decision": "tool",
+        "tools": [{"name": "search_vector_database", "args": {"query": "{query}", "limit": 2}}],
+        "message_to_user": "Харгалзах хуулийн зохицуулалтыг хайж байна..."
+    },
+    {
+        "rationale": "The retrieved articles answer the question.",
+        "decision": "answer",
+        "message_to_user": (
+            "Хүний хувийн мэдээлэл хамгаалах тухай хуулийн холбогдох зүйлд зааснаар мэдээллийн эзний "
+            "зөвшөөрөлгүйгээр хувийн мэдээллийг цуглуулах, боловсруулах, ашиглахыг хориглоно. "
+            "Танд өөр асууж тодруулах зүйл байна уу?"
+        )
+    }
+]
+
+def _fill(value: Any, query: str) -> Any:
+    if isinstance(value, str):
+        return value.replace("{query}", query)
+    if isinstance(value, list):
+        return [_fill(item, query) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, query) for key, item in value.items()}
+    return value
+
+class MockModelServer:
+    """
+    Streams `script` turns as chat completion chunks. A turn is chosen by the number
+    of tool response blocks the agent has already appended to the conversation.
+    """
+
+    def __init__(self, script: List[Dict[str, Any]], ttft: float = 0.2,
+                 tokens_per_sec: float = 50.0, chars_per_token: int = 4) -> None:
+        self.script = script
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.chars_per_token = chars_per_token
+
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completion_tokens = 0
+
+        self.app = Starlette(routes=[
+            Route("/v1/chat/completions", self.completions, methods=["POST"]),
+            Route("/stats", self.stats, methods=["GET"])
+        ])
+
+    @staticmethod
+    def _turn_index(messages: List[Dict[str, Any]]) -> int:
+        # tool responses come back as consecutive assistant messages, one block per turn
+        blocks = 0
+        previous_role = None
+        for message in messages:
+            if message["role"] == "assistant" and previous_role != "assistant":
+                blocks += 1
+            previous_role = message["role"]
+        return blocks
+
+    def decide(self, messages: List[Dict[str, Any]]) -> str:
+        query = next((message["content"] for message in messages if message["role"] == "user"), "")
+        turn = self.script[min(self._turn_index(messages), len(self.script) - 1)]
+        return json.dumps(_fill(turn, query), ensure_ascii=False)
+
+    async def completions(self, request: Request) -> Response:
+        body = await request.json()
+        text = self.decide(body["messages"])
+        tokens = [text[i:i+self.chars_per_token] for i in range(0, len(text), self.chars_per_token)]
+        prompt_tokens = sum(len(str(message["content"])) for message in body["messages"]) // self.chars_per_token
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "mock")
+
+        def chunk(delta: Dict[str, Any], finish_reason: Any = None, usage: Any = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else [],
+                "usage": usage
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        self.requests += 1
+
+        if not body.get("stream"):
+            self.completion_tokens += len(tokens)
+            await asyncio.sleep(self.ttft + len(tokens) / self.tokens_per_sec)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                          "total_tokens": prompt_tokens + len(tokens)}
+            })
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def stream() -> AsyncIterator[str]:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            sent = 0
+            try:
+                await asyncio.sleep(self.ttft)
+                yield chunk({"role": "assistant", "content": ""})
+
+                start_time = time.perf_counter()
+                for token in tokens:
+                    # tokens are paced against the start so that sleep overshoot does not add up
+                    delay = start_time + sent / self.tokens_per_sec - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    yield chunk({"content": token})
+                    sent += 1
+
+                yield chunk({}, finish_reason="stop")
+                if include_usage:
+                    yield chunk({}, usage={"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                                           "total_tokens": prompt_tokens + len(tokens)})
+                yield "data: [DONE]\n\n"
+            finally:
+                # an aborted stream (e.g. a routed turn) counts only the tokens it received
+                self.completion_tokens += sent
+                self.in_flight -= 1
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    async def stats(self, request: Request) -> Response:
+        return JSONResponse({
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "completion_tokens": self.completion_tokens
+        })
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Scripted OpenAI-compatible streaming model server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--script", default=None, help="JSON file with the list of scripted turns")
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="delay before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="streaming rate of every response")
+    parser.add_argument("--chars-per-token", type=int, default=4)
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, encoding="utf-8") as file:
+            script = json.load(file)
+
+    server = MockModelServer(script, args.ttft_ms / 1000, args.tokens_per_sec, args.chars_per_token)
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,188 @@
+# Run from the repository root: python -m tests.retrieval_benchmark
+#
+# Offline benchmark of the ingestion and retrieval path on the bundled law.
+# The /embed server is replaced by tests/fake_embedding_server.py and the
+# default backend is the embedded NumPy store, so no GPU or Weaviate is needed.
+# `--backend weaviate` measures DatabaseManager against a local Weaviate in a
+# separate collection instead. Results are written as JSON, and `--compare`
+# prints the change of every metric against an earlier result file.
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+
+from datetime import datetime, timezone
+
+# the benchmark must not touch the answer cache of a deployment
+os.environ["ANSWER_CACHE_PATH"] = ""
+
+from src.embedding_cache import EmbeddingCache
+from utils.document_management import DocumentManager
+from tests.fake_embedding_server import FakeEmbeddingServer, DIMENSIONS
+
+FILEPATH = "docs/ХҮНИЙ ХУВИЙН МЭДЭЭЛЭЛ ХАМГААЛАХ ТУХАЙ.docx"
+
+def percentiles(timings):
+    ordered = sorted(timings)
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    return {
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": at(0.50) * 1000,
+        "p95_ms": at(0.95) * 1000,
+        "p99_ms": at(0.99) * 1000,
+        "max_ms": ordered[-1] * 1000
+    }
+
+def measure(name, function, repeats):
+    function()
+
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+
+    # the fastest run is the least disturbed by other load on the machine
+    result = {"best_ms": min(timings) * 1000, **percentiles(timings)}
+    print(f"{name:<24} best {result['best_ms']:8.2f} ms, p50 {result['p50_ms']:8.2f} ms")
+    return result
+
+def build_backend(args, embedding_host, store_path):
+    # query embeddings are not cached, every read pays its /embed round trip
+    embedding_cache = EmbeddingCache("benchmark", max_size=0)
+
+    if args.backend == "weaviate":
+        from src.database_management import DatabaseManager
+        dbms = DatabaseManager(embedding_host, embedding_cache, collection_name=args.collection)
+        dbms.delete("*")
+        return dbms
+
+    from src.numpy_backend import NumpyDatabaseManager
+    return NumpyDatabaseManager(embedding_host, store_path, embedding_cache)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(results, prefix=""):
+    metrics = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            metrics[f"{prefix}{key}"] = value
+    return metrics
+
+def compare(results, previous_path):
+    with open(previous_path, encoding="utf-8") as file:
+        previous = flatten(json.load(file)["results"])
+
+    print(f"\nChange against {previous_path}:")
+    for name, value in flatten(results).items():
+        if previous.get(name):
+            print(f"{name:<44} {previous[name]:12.2f} -> {value:12.2f} ({(value / previous[name] - 1) * 100:+6.1f}%)")
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Offline ingestion and retrieval benchmark.")
+    parser.add_argument("--document", default=FILEPATH)
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--repeats", type=int, default=20, help="runs of the parsing measurements")
+    parser.add_argument("--queries", type=int, default=100, help="reads measured per limit")
+    parser.add_argument("--limits", default="1,2,5,10", help="comma separated `limit` values of the reads")
+    parser.add_argument("--backend", choices=["numpy", "weaviate"], default="numpy")
+    parser.add_argument("--collection", default="LawDocumentsBenchmark",
+                        help="Weaviate collection used and emptied by the benchmark")
+    parser.add_argument("--dimensions", type=int, default=DIMENSIONS)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0,
+                        help="delay added to every /embed request")
+    parser.add_argument("--output", default="retrieval_benchmark.json")
+    parser.add_argument("--compare", default=None, help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    results = {}
+
+    results["segment_document"] = measure(
+        "segment_document", lambda: DocumentManager.segment_document(args.document), args.repeats
+    )
+
+    articles = DocumentManager.segment_document(args.document)
+    results["chunk_articles"] = measure(
+        "chunk_articles", lambda: DocumentManager.chunk_articles(articles, args.chunk_size), args.repeats
+    )
+    chunks = DocumentManager.chunk_articles(articles, args.chunk_size)
+
+    store_path = tempfile.mkdtemp(prefix="retrieval_benchmark_")
+    with FakeEmbeddingServer(args.dimensions, args.embed_latency_ms / 1000) as embedder:
+        dbms = build_backend(args, embedder.host, store_path)
+        try:
+            start_time = time.perf_counter()
+            summary = dbms.ingest(chunks)
+            elapsed = time.perf_counter() - start_time
+
+            # a second ingestion of unchanged chunks only compares content hashes
+            start_time = time.perf_counter()
+            dbms.ingest(chunks)
+            unchanged_elapsed = time.perf_counter() - start_time
+
+            results["ingest"] = {
+                "chunks": len(chunks),
+                "seconds": elapsed,
+                "chunks_per_sec": len(chunks) / elapsed,
+                "unchanged_seconds": unchanged_elapsed,
+                "embed_requests": embedder.requests
+            }
+            print(f"{'ingest':<24} {len(chunks)} chunks in {elapsed:.2f}s "
+                  f"({len(chunks) / elapsed:.1f} chunks/sec), unchanged re-ingest {unchanged_elapsed:.2f}s, {summary}")
+
+            # article names and the opening words of the chunks, as short user queries
+            queries = [article["article_name"] for article in articles]
+            queries += [" ".join(chunk["chunk_body"].split("\n", 1)[-1].split()[:8]) for chunk in chunks]
+            queries = [queries[i % len(queries)] for i in range(args.queries)]
+
+            results["read"] = {}
+            for limit in [int(limit) for limit in args.limits.split(",")]:
+                dbms.read(queries[0], limit)
+
+                timings = []
+                for query in queries:
+                    start_time = time.perf_counter()
+                    dbms.read(query, limit)
+                    timings.append(time.perf_counter() - start_time)
+
+                results["read"][f"limit_{limit}"] = percentiles(timings)
+                stats = results["read"][f"limit_{limit}"]
+                print(f"{f'read limit={limit}':<24} p50 {stats['p50_ms']:7.2f} ms, "
+                      f"p95 {stats['p95_ms']:7.2f} ms, p99 {stats['p99_ms']:7.2f} ms")
+
+            if args.backend == "weaviate":
+                dbms.delete("*")
+        finally:
+            dbms.close()
+            shutil.rmtree(store_path, ignore_errors=True)
+
+    report = {
+        "benchmark": "retrieval",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -21,77 +21,149 @@
 # SOFTWARE.
 
 import re
-import docx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Iterable, Optional
 
 from langchain_core.documents import Document
-from langchain_community.document_loaders import Docx2txtLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from utils.docx_reader import iter_docx_paragraphs
+
+# Chapter headings end a paragraph ("НЭГДҮГЭЭР БҮЛЭГ") and are followed by
+# the chapter name, articles start with "1 дүгээр зүйл." inside a paragraph.
+CHAPTER_PATTERN = re.compile(r"[А-ЯЁӨҮ]{2,}(?:ДҮГЭЭР|ДУГААР) БҮЛЭГ$")
+ARTICLE_PATTERN = re.compile(r"\d{1,} дугаар зүйл\.|\d{1,} дүгээр зүйл\.")
 
 class DocumentManager:
 
     @classmethod
-    def segment_document(cls, filepath: str) -> List[Dict[str, Any]]:
+    def iter_paragraphs(cls, filepath: str) -> Iterator[str]:
+        for paragraph in iter_docx_paragraphs(filepath):
+            yield paragraph.text
+
+    @classmethod
+    def iter_articles(cls, filepath: str, document_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Walks the paragraphs of the document once and yields its articles as
+        soon as they end. Besides the names and body, each record carries the
+        character offsets (`start_offset`, `end_offset`) of the article within
+        the newline-joined document text.
+        Args:
+            filepath (str): docx path to read the document from
+            document_name (Optional[str]): name the articles are stored under,
+                the file path by default
         
-        chunks = []
+        Returns:
+            Iterator[Dict[str, Any]]: article records in document order
+        """
 
-        document = docx.Document(filepath)
+        chapter_index = 0
+        chapter_name = None
+        pending_chapter_name = False
+
+        article_parts = None
+        article_start = 0
+
+        def make_article(end_offset: int) -> Dict[str, Any]:
+            article_text = "".join(article_parts)
+            return {
+                "document_name": document_name or filepath,
+                "chapter_name": f"{chapter_index}-Р БҮЛЭГ: {chapter_name}",
+                "article_name": article_text.partition("\n")[0],
+                "article_body": article_text.replace("\n\n", "\n"),
+                "start_offset": article_start,
+                "end_offset": end_offset
+            }
+
+        # a paragraph can only be a chapter heading if another one follows it,
+        # so every paragraph is handled one step behind the reader
+        offset = 0
+        separator = ""
+        paragraphs = cls.iter_paragraphs(filepath)
+        current = next(paragraphs, None)
+
+        while current is not None:
+            following = next(paragraphs, None)
+
+            text = separator + current
+
+            heading = CHAPTER_PATTERN.search(current) if following is not None else None
+            body_end = len(separator) + heading.start() if heading else len(text)
+
+            if pending_chapter_name:
+                chapter_name = current
+                pending_chapter_name = False
+
+            if chapter_index > 0:
+                position = 0
+                for match in ARTICLE_PATTERN.finditer(text, 0, body_end):
+                    if article_parts is not None:
+                        article_parts.append(text[position:match.start()])
+                        yield make_article(offset + match.start())
+                    article_parts = []
+                    article_start = offset + match.end()
+                    position = match.end()
+
+                if article_parts is not None:
+                    article_parts.append(text[position:body_end])
+
+            if heading:
+                if article_parts is not None:
+                    yield make_article(offset + body_end)
+                article_parts = None
+                chapter_index += 1
+                pending_chapter_name = True
+                # the heading swallows the newline in front of the next paragraph
+                separator = ""
+                offset += len(text) + 1
+            else:
+                separator = "\n"
+                offset += len(text)
+
+            current = following
+
+        if article_parts is not None:
+            yield make_article(offset)
 
-        full_text = []
-        for paragraph in document.paragraphs:
-            full_text.append(paragraph.text)
+    @classmethod
+    def segment_document(cls, filepath: str) -> List[Dict[str, Any]]:
+        return list(cls.iter_articles(filepath))
 
-        full_text = '\n'.join(full_text)
-        
-        chapter_split_pattern = r"[А-ЯЁӨҮ]{2,}ДҮГЭЭР БҮЛЭГ\n|[А-ЯЁӨҮ]{2,}ДУГААР БҮЛЭГ\n"
-        article_split_pattern = r"\d{1,} дугаар зүйл\.|\d{1,} дүгээр зүйл\."
-
-        chapters = re.split(chapter_split_pattern, full_text)
-
-        for i, _ in enumerate(chapters):
-            if i > 0:
-                chapter_name = chapters[i].split("\n")[0]
-                articles = re.split(article_split_pattern, chapters[i])
-                for j, _ in enumerate(articles):
-                    if j > 0:
-                        article_name = articles[j].split("\n")[0]
-                        chunks.append({
-                            "document_name": filepath,
-                            "chapter_name": f"{i}-Р БҮЛЭГ: {chapter_name}",
-                            "article_name": f"{article_name}",
-                            "article_body": articles[j].replace("\n\n", "\n")
-                        })
-
-        return chunks
-        
     @classmethod
-    def chunk_articles(cls, articles: List[Dict[str, Any]], chunk_size: int) -> List[Dict[str, Any]]:
-        chunks = []
+    def iter_chunks(cls, articles: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily cuts every article body into `chunk_size` character chunks.
+        The articles may come straight from `iter_articles`, so that only
+        one article is held in memory at a time.
+        """
         for article in articles:
+            body = article["article_body"]
+            body_length = len(body)
+
             start_idx = 0
             idx = 1
-            while len(article["article_body"][start_idx:]) > chunk_size:
-                chunk = article["article_body"][start_idx:start_idx+chunk_size]
-                chunks.append({
+            while body_length - start_idx > chunk_size:
+                chunk = body[start_idx:start_idx+chunk_size]
+                yield {
                     "order_id": idx,
                     "document": article["document_name"],
                     "chapter": article["chapter_name"],
                     "article": article["article_name"],
                     "chunk_body": f"ХАРГАЛЗАХ ХУУЛЬ: ({article['document_name']}/БҮЛГИЙН НЭР: {article['chapter_name']}/ЗҮЙЛИЙН НЭР:{article['article_name']})\n{chunk}"
-                })
+                }
                 start_idx = start_idx + chunk_size
                 idx += 1
 
-            chunk = article["article_body"][start_idx:]
-            chunks.append({
+            chunk = body[start_idx:]
+            yield {
                 "order_id": idx,
                 "document": article["document_name"],
                 "chapter": article["chapter_name"],
                 "article": article["article_name"],
                 "chunk_body": f"({article['document_name']}/{article['chapter_name']}/{article['article_name']})\n{chunk}"
-            })
+            }
 
-        return chunks
+    @classmethod
+    def chunk_articles(cls, articles: Iterable[Dict[str, Any]], chunk_size: int) -> List[Dict[str, Any]]:
+        return list(cls.iter_chunks(articles, chunk_size))
     
     @classmethod
     def split_text_into_chunks(cls, filepath: str, is_legal_document: bool = True) -> List[Document]:
@@ -109,8 +181,8 @@ class DocumentManager:
             List[Document]: List of documents split into segments as per the requirements
         """
 
-        loader = Docx2txtLoader(filepath)
-        documents = loader.load()
+        full_text = "\n\n".join(paragraph.text for paragraph in iter_docx_paragraphs(filepath, include_tables=True))
+        documents = [Document(page_content=full_text.strip(), metadata={"source": filepath})]
 
         # dediin ded zuil angiudiin butssees harwal tab arilgaad 
         # daraa ni newline arilgah heregtei
@@ -0,0 +1,196 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import zipfile
+
+from xml.parsers import expat
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+# expat reports namespaced names as "<namespace uri> <local name>"
+W_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main "
+
+BODY = f"{W_NAMESPACE}body"
+PARAGRAPH = f"{W_NAMESPACE}p"
+PARAGRAPH_STYLE = f"{W_NAMESPACE}pStyle"
+TABLE = f"{W_NAMESPACE}tbl"
+RUN = f"{W_NAMESPACE}r"
+TEXT = f"{W_NAMESPACE}t"
+BREAK = f"{W_NAMESPACE}br"
+HYPERLINK = f"{W_NAMESPACE}hyperlink"
+STYLE = f"{W_NAMESPACE}style"
+STYLE_ID = f"{W_NAMESPACE}styleId"
+NAME = f"{W_NAMESPACE}name"
+VAL = f"{W_NAMESPACE}val"
+TYPE = f"{W_NAMESPACE}type"
+
+# Text equivalents of the run children, as python-docx maps them
+RUN_TEXT = {
+    f"{W_NAMESPACE}tab": "\t",
+    f"{W_NAMESPACE}ptab": "\t",
+    f"{W_NAMESPACE}cr": "\n",
+    f"{W_NAMESPACE}noBreakHyphen": "-"
+}
+
+READ_SIZE = 1 << 16
+
+class DocxParagraph(NamedTuple):
+    text: str
+    style: Optional[str]
+
+class _ParagraphCollector:
+    """
+    expat handlers turning the body of `word/document.xml` into paragraphs.
+    Only the text of the runs directly inside a paragraph (or inside its
+    hyperlinks) is kept, which is what python-docx's `Paragraph.text` returns.
+    """
+
+    def __init__(self, style_names: Dict[str, str], include_tables: bool) -> None:
+        self.style_names = style_names
+        self.include_tables = include_tables
+        self.paragraphs: List[DocxParagraph] = []
+
+        self.depth = 0
+        self.body_depth = None
+        self.table_depth = None
+        self.paragraph_depth = None
+        self.run_depth = None
+        self.in_hyperlink = False
+        self.in_text = False
+
+        self.parts: List[str] = []
+        self.style = None
+
+    def start(self, name: str, attributes: Dict[str, str]) -> None:
+        self.depth += 1
+        depth = self.depth
+
+        if self.paragraph_depth is not None:
+            if self.run_depth is not None:
+                if depth == self.run_depth + 1:
+                    if name == TEXT:
+                        self.in_text = True
+                    elif name == BREAK:
+                        # page and column breaks carry no text
+                        if attributes.get(TYPE, "textWrapping") == "textWrapping":
+                            self.parts.append("\n")
+                    elif name in RUN_TEXT:
+                        self.parts.append(RUN_TEXT[name])
+
+            elif name == RUN and (depth == self.paragraph_depth + 1 or
+                                  (depth == self.paragraph_depth + 2 and self.in_hyperlink)):
+                self.run_depth = depth
+
+            elif name == HYPERLINK and depth == self.paragraph_depth + 1:
+                self.in_hyperlink = True
+
+            elif name == PARAGRAPH_STYLE and depth == self.paragraph_depth + 2:
+                style_id = attributes.get(VAL)
+                self.style = self.style_names.get(style_id, style_id)
+
+        elif name == PARAGRAPH and self.body_depth is not None and (
+                depth == self.body_depth + 1 or self.table_depth is not None):
+            self.paragraph_depth = depth
+            self.in_hyperlink = False
+            self.parts = []
+            self.style = None
+
+        elif name == BODY:
+            self.body_depth = depth
+
+        elif name == TABLE and self.include_tables and self.body_depth is not None and depth == self.body_depth + 1:
+            self.table_depth = depth
+
+    def end(self, name: str) -> None:
+        depth = self.depth
+        self.depth -= 1
+
+        if self.paragraph_depth is None:
+            if depth == self.table_depth:
+                self.table_depth = None
+            return
+
+        if self.in_text and name == TEXT:
+            self.in_text = False
+        elif depth == self.run_depth:
+            self.run_depth = None
+        elif name == HYPERLINK and depth == self.paragraph_depth + 1:
+            self.in_hyperlink = False
+        elif depth == self.paragraph_depth:
+            self.paragraphs.append(DocxParagraph("".join(self.parts), self.style))
+            self.paragraph_depth = None
+
+    def data(self, text: str) -> None:
+        if self.in_text:
+            self.parts.append(text)
+
+def _read_style_names(archive: zipfile.ZipFile) -> Dict[str, str]:
+    style_names = {}
+    current_style = []
+
+    def start(name: str, attributes: Dict[str, str]) -> None:
+        if name == STYLE:
+            current_style[:] = [attributes.get(STYLE_ID)]
+        elif name == NAME and current_style:
+            style_names[current_style[0]] = attributes.get(VAL)
+
+    try:
+        with archive.open("word/styles.xml") as styles_xml:
+            parser = expat.ParserCreate(namespace_separator=" ")
+            parser.StartElementHandler = start
+            parser.ParseFile(styles_xml)
+    except KeyError:
+        pass
+
+    return style_names
+
+def iter_docx_paragraphs(filepath: str, include_tables: bool = False) -> Iterator[DocxParagraph]:
+    """
+    Streams the paragraphs of a .docx file straight out of `word/document.xml`
+    with the incremental expat parser, without building a document object
+    model. The text of a paragraph matches python-docx's `Paragraph.text`.
+    Args:
+        filepath (str): docx path to read the document from
+        include_tables (bool): also yield the paragraphs inside body-level tables
+    
+    Returns:
+        Iterator[DocxParagraph]: paragraph text and style name (None for the default style)
+    """
+
+    with zipfile.ZipFile(filepath) as archive:
+        collector = _ParagraphCollector(_read_style_names(archive), include_tables)
+
+        parser = expat.ParserCreate(namespace_separator=" ")
+        parser.buffer_text = True
+        parser.StartElementHandler = collector.start
+        parser.EndElementHandler = collector.end
+        parser.CharacterDataHandler = collector.data
+
+        with archive.open("word/document.xml") as document_xml:
+            while True:
+                data = document_xml.read(READ_SIZE)
+                parser.Parse(data, not data)
+
+                yield from collector.paragraphs
+                collector.paragraphs.clear()
+
+                if not data:
+                    break
@@ -21,13 +21,18 @@
 # SOFTWARE.
 
 import os
+import time
+import heapq
+import random
 import asyncio
 import logging
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple
 
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from dotenv import load_dotenv
+from utils.stream_parser import StreamingJSONParser
+from utils.telemetry import telemetry, SPAN_KIND_CLIENT
 
 _ = load_dotenv()
 
@@ -59,36 +64,354 @@ def setup_client(api_key: str) -> ModelClient | None:
         logger.info(f"Client uusgehed aldaa garaw: {str(err)}")
         return None
 
+# Scheduling priorities of the model calls, lower runs first: final answers handed
+# over by the fast model finish sessions, later turns of running sessions go before
+# new sessions
+PRIORITY_FINAL = 0
+PRIORITY_INTERMEDIATE = 1
+PRIORITY_FIRST = 2
+
+# Errors worth retrying, everything else (bad requests, auth) fails at once
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Completion tokens reserved for a turn before its real usage is known
+ESTIMATED_COMPLETION_TOKENS = 512
+
+class TokenBucket:
+    """
+    Continuously refilled budget of `per_minute` units holding at most one minute's worth.
+    A non-positive rate means no limit.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.per_minute / 60.0)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` units are available.
+        """
+        if self.per_minute <= 0:
+            return 0.0
+
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.per_minute
+
+    def consume(self, amount: float) -> None:
+        if self.per_minute > 0:
+            self._refill()
+            self.level -= amount
+
+    def drain(self) -> None:
+        # after a rate-limit response the provider's budget is evidently spent
+        if self.per_minute > 0:
+            self._refill()
+            self.level = min(self.level, 0.0)
+
+class RequestScheduler:
+    """
+    Admission control of the model calls against the provider's rate limits.
+    Calls wait in a priority queue and are released when the request and token
+    buckets both have room and fewer than `max_concurrency` calls are running.
+    Rate-limit, timeout, connection and server errors are retried with full-jitter
+    exponential backoff (or the provider's Retry-After), and a rate-limit response
+    drains the request bucket so that the queued calls back off together.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 32, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.waits: List[float] = []
+
+        # (priority, arrival, estimated tokens, future) entries
+        self._queue: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._arrivals = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while True:
+            # drop callers that were cancelled while queued
+            while self._queue and self._queue[0][3].done():
+                heapq.heappop(self._queue)
+
+            if not self._queue or self.in_flight >= self.max_concurrency:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, _, estimated_tokens, future = self._queue[0]
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+            if delay > 0:
+                # a higher-priority arrival or a finished call re-evaluates the head
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._queue)
+            self.requests.consume(1)
+            self.tokens.consume(estimated_tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, estimated_tokens: int, priority: int) -> None:
+        self._ensure_dispatcher()
+
+        future = asyncio.get_running_loop().create_future()
+        self._arrivals += 1
+        heapq.heappush(self._queue, (priority, self._arrivals, estimated_tokens, future))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        self._wakeup.set()
+
+        start_time = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # cancelled after the dispatcher admitted the call, its slot is given back
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        finally:
+            self.waits.append(time.perf_counter() - start_time)
+            del self.waits[:-1000]
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wakeup.set()
+
+    def settle(self, estimated_tokens: int, used_tokens: int) -> None:
+        """
+        Corrects the token bucket by the difference of the real and the estimated usage.
+        """
+        self.tokens.consume(used_tokens - estimated_tokens)
+
+    def _backoff(self, attempt: int, err: Exception) -> float:
+        retry_after = None
+        response = getattr(err, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.max_delay)
+        except ValueError:
+            pass
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, call: Callable[[], Awaitable[Any]], estimated_tokens: int,
+                  priority: int = PRIORITY_INTERMEDIATE) -> Any:
+        """
+        Runs `call` once the budgets admit it, retrying retryable errors.
+        The caller reports the real usage through `settle` and must call
+        `done` when the admitted call (e.g. its stream) has finished.
+        """
+        self.calls += 1
+        attempt = 0
+        while True:
+            await self._acquire(estimated_tokens, priority)
+            try:
+                return await call()
+            except RETRYABLE_ERRORS as err:
+                self._release()
+                if isinstance(err, RateLimitError):
+                    self.rate_limited += 1
+                    self.requests.drain()
+
+                if attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+
+                delay = self._backoff(attempt, err)
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Model call failed ({type(err).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._release()
+                raise
+
+    def done(self) -> None:
+        self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "mean_wait_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "p95_wait_ms": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 1) if waits else 0.0
+        }
+
+def estimate_tokens(context: List[Dict[str, str]]) -> int:
+    # about 4 UTF-8 bytes per token, i.e. 2 Cyrillic letters
+    return sum(len(message["content"].encode("utf-8")) // 4 + 4 for message in context)
+
 # Enenees gaduur yur ni ymr neg generation horiotoi kk.
 async def generate_message(client: ModelClient, model: str, 
-                           context: List[Dict[str, str]]) -> str:
+                           context: List[Dict[str, str]],
+                           on_field: Optional[Callable[[str, Any], Optional[bool]]] = None,
+                           stats: Optional[Dict[str, Any]] = None,
+                           on_text: Optional[Callable[[str], None]] = None,
+                           scheduler: Optional[RequestScheduler] = None,
+                           priority: int = PRIORITY_INTERMEDIATE) -> str:
     """
     Generates a query in the context of the interaction history from the stated model.
+    The JSON decision is parsed while it streams: only `message_to_user` is printed
+    as it arrives and every top-level field is handed to `on_field` once complete,
+    so a tool call can be dispatched before the last token. A callback returning True
+    aborts the generation, e.g. when a routed turn has to go to another model.
     Args:
         client (ModelClient): driver to the model host
         model (str): name of the model for use running on the host
         context (List[Dict[str, str]]): list of interactive roles and corresponding content text messages
+        on_field (Callable[[str, Any], Optional[bool]]): optional callback receiving completed fields
+        stats (Dict[str, Any]): optional dictionary filled with the timings and the token usage
+        on_text (Callable[[str], None]): optional receiver of the `message_to_user` text
+            as it streams, replacing the terminal output (e.g. for the server mode)
+        scheduler (RequestScheduler): optional rate-limit aware admission of the call
+        priority (int): scheduling priority of the call, PRIORITY_FINAL runs first
     
     Returns:
         str: Model response either the final output or a tool call.
     """
 
-    stream = await client.chat.completions.create(
-        messages=context, 
-        model=model, 
-        stream=True
-    )
+    with telemetry.span("llm.generate", kind=SPAN_KIND_CLIENT, model=model, priority=priority) as span:
+        start_time = time.perf_counter()
+        timings = {}
 
-    full_response = str()
+        async def create():
+            return await client.chat.completions.create(
+                messages=context, 
+                model=model, 
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+        estimated_tokens = estimate_tokens(context) + ESTIMATED_COMPLETION_TOKENS
+        if scheduler is not None:
+            stream = await scheduler.run(create, estimated_tokens, priority)
+            timings["queued"] = time.perf_counter() - start_time
+        else:
+            stream = await create()
+
+        parser = StreamingJSONParser(stream_keys=["message_to_user"])
+        full_response = str()
+        is_printing = False
+        is_aborted = False
     
-    print(f"\033[32m>>>АГЕНТ: ", end="")
-    async for token in stream:
-        if token.choices[0].delta.content:
-            print(token.choices[0].delta.content, end="")
-            full_response += token.choices[0].delta.content
-
-    print("\033[0m\n")
-    return full_response
+        usage = None
+        try:
+            async for token in stream:
+                # the usage arrives in a final chunk without choices
+                if getattr(token, "usage", None) is not None:
+                    usage = token.usage
+
+                if token.choices and token.choices[0].delta.content:
+                    content = token.choices[0].delta.content
+                    full_response += content
+                    timings.setdefault("first_token", time.perf_counter() - start_time)
+
+                    for kind, key, payload in parser.feed(content):
+                        if kind == "text":
+                            if not is_printing:
+                                timings["first_message"] = time.perf_counter() - start_time
+                                if on_text is None:
+                                    print(f"\033[32m>>>АГЕНТ: ", end="")
+                                is_printing = True
+
+                            if on_text is not None:
+                                on_text(payload)
+                            else:
+                                print(payload, end="", flush=True)
+                        else:
+                            timings[key] = time.perf_counter() - start_time
+                            if on_field is not None and on_field(key, payload):
+                                is_aborted = True
+                                break
+
+                    if is_aborted:
+                        await stream.close()
+                        break
+        finally:
+            if scheduler is not None:
+                scheduler.done()
+                if usage is not None:
+                    scheduler.settle(estimated_tokens, usage.prompt_tokens + usage.completion_tokens)
+
+        if on_text is None:
+            if is_printing:
+                print("\033[0m\n")
+            elif not is_aborted:
+                # not the expected JSON decision, show what the model said instead
+                print(f"\033[32m>>>АГЕНТ: {full_response}\033[0m\n")
+
+        timings["total"] = time.perf_counter() - start_time
+        logger.info(f"Generation timings of {model}{' (aborted)' if is_aborted else ''}: " + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items()))
+
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached_tokens = getattr(details, "cached_tokens", None) or 0
+            logger.info(f"Token usage: prompt={usage.prompt_tokens} (cached {cached_tokens}), "
+                        f"completion={usage.completion_tokens}")
+
+        span.set_attribute("aborted", is_aborted)
+        if "queued" in timings:
+            telemetry.observe("llm_queue_seconds", timings["queued"], "Wait of the model calls in the scheduler.", model=model)
+        if "first_token" in timings:
+            telemetry.observe("llm_first_token_seconds", timings["first_token"], "Time to the first streamed token.", model=model)
+        if usage is not None:
+            for kind, count in (("prompt", usage.prompt_tokens), ("cached", cached_tokens), ("completion", usage.completion_tokens)):
+                telemetry.increment("llm_tokens_total", count, "Model tokens by kind.", model=model, kind=kind)
+
+        if stats is not None:
+            stats["timings"] = timings
+            stats["aborted"] = is_aborted
+            if usage is not None:
+                stats["prompt_tokens"] = usage.prompt_tokens
+                stats["cached_tokens"] = cached_tokens
+                stats["completion_tokens"] = usage.completion_tokens
+
+        return full_response
 
 if __name__ == '__main__':
 
@@ -0,0 +1,169 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+
+from typing import Any, Iterable, List, Optional, Tuple
+
+# (kind, key, payload): ("text", key, decoded delta) while a streamed string field
+# grows, and ("field", key, value) once a top-level field is complete
+ParseEvent = Tuple[str, str, Any]
+
+_WHITESPACE = " \t\r\n"
+
+class StreamingJSONParser:
+    """
+    Incremental scanner of a single JSON object arriving in arbitrary pieces.
+    Every top-level field is reported as soon as its value is closed, and the
+    string values of `stream_keys` are additionally reported character by
+    character while they are still being generated. Text before the opening
+    brace (e.g. a code fence) is skipped.
+    """
+
+    def __init__(self, stream_keys: Iterable[str] = ()) -> None:
+        self.stream_keys = set(stream_keys)
+        self.fields = {}
+        self.done = False
+
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = ""
+        self._phase = "start"
+        self._key: Optional[str] = None
+        self._value_start = 0
+        self._pending_surrogate = ""
+
+    def feed(self, text: str) -> List[ParseEvent]:
+        events: List[ParseEvent] = []
+        for char in text:
+            if self.done:
+                break
+            self._buffer.append(char)
+            self._step(char, len(self._buffer) - 1, events)
+
+        return events
+
+    def _step(self, char: str, position: int, events: List[ParseEvent]) -> None:
+        if self._in_string:
+            self._string_char(char, position, events)
+            return
+
+        if self._phase == "start":
+            if char == "{":
+                self._depth = 1
+                self._phase = "key"
+            return
+
+        if self._depth > 1:
+            # inside a nested value of a top-level field, only the nesting matters
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._complete(position + 1, events)
+            return
+
+        if self._phase == "key":
+            if char == '"':
+                self._in_string = True
+                self._value_start = position
+            elif char == "}":
+                self.done = True
+        elif self._phase == "colon":
+            if char == ":":
+                self._phase = "value"
+        elif self._phase == "value":
+            if char in _WHITESPACE:
+                return
+            self._value_start = position
+            self._phase = "in_value"
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+        elif self._phase == "in_value":
+            # a number or literal ends at the next separator
+            if char in _WHITESPACE or char in ",}":
+                self._complete(position, events)
+                self._after_value(char)
+        elif self._phase == "after_value":
+            self._after_value(char)
+
+    def _after_value(self, char: str) -> None:
+        if char == ",":
+            self._phase = "key"
+        elif char == "}":
+            self.done = True
+
+    def _string_char(self, char: str, position: int, events: List[ParseEvent]) -> None:
+        is_streamed = (self._depth == 1 and self._phase == "in_value"
+                       and self._key in self.stream_keys)
+
+        if self._escape:
+            self._escape += char
+            if self._escape[1] == "u" and len(self._escape) < 6:
+                return
+            decoded = json.loads(f'"{self._escape}"')
+            self._escape = ""
+            if is_streamed:
+                self._emit_text(decoded, events)
+            return
+
+        if char == "\\":
+            self._escape = char
+        elif char == '"':
+            self._in_string = False
+            if self._depth > 1:
+                return
+            if self._phase == "key":
+                self._key = json.loads("".join(self._buffer[self._value_start:position + 1]))
+                self._phase = "colon"
+            else:
+                self._complete(position + 1, events)
+        elif is_streamed:
+            self._emit_text(char, events)
+
+    def _emit_text(self, text: str, events: List[ParseEvent]) -> None:
+        # a surrogate pair arrives as two escapes and is only printable joined
+        text = self._pending_surrogate + text
+        self._pending_surrogate = ""
+        if text and "\ud800" <= text[-1] <= "\udbff":
+            text, self._pending_surrogate = text[:-1], text[-1]
+        if text:
+            text = text.encode("utf-16", "surrogatepass").decode("utf-16")
+            events.append(("text", self._key, text))
+
+    def _complete(self, end: int, events: List[ParseEvent]) -> None:
+        raw = "".join(self._buffer[self._value_start:end])
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+
+        self.fields[self._key] = value
+        events.append(("field", self._key, value))
+
+        self._phase = "after_value"
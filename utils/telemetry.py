@@ -0,0 +1,343 @@
+# MIT License
+
+# Copyright (c) 2025 Erdenebileg Byambadorj
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import json
+import time
+import random
+import bisect
+import logging
+import threading
+import contextvars
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+_ = load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger()
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Finished spans buffered before they are appended to the trace file
+SPAN_FLUSH_SIZE = 64
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels: LabelSet, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class Histogram:
+    """
+    Prometheus style histogram: cumulative bucket counts, sum and count per label set.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.series: Dict[LabelSet, List[float]] = {}
+
+    def observe(self, value: float, labels: LabelSet) -> None:
+        # per label set: one count per bucket, then +Inf, sum
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels(labels, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            bucket_labels = _format_labels(labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.series: Dict[LabelSet, float] = {}
+
+    def increment(self, value: float, labels: LabelSet) -> None:
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        return lines
+
+class Span:
+    """
+    Timed stage of a request. Spans nest through a context variable, so the
+    stages of concurrent requests (and the tasks and threads they start) keep
+    their own parents. A finished span is observed in the stage latency
+    histogram and, with a trace file configured, exported as an OTLP span.
+    """
+
+    __slots__ = ("telemetry", "name", "trace_id", "span_id", "parent_id", "kind",
+                 "attributes", "error", "_start_ns", "_start", "_token")
+
+    def __init__(self, telemetry: "Telemetry", name: str, trace_id: str, parent_id: Optional[str],
+                 kind: int, attributes: Dict[str, Any]) -> None:
+        self.telemetry = telemetry
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self._start_ns = 0
+        self._start = 0.0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        # W3C trace context of this span, for the other side of a process boundary
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def __enter__(self) -> "Span":
+        self._start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.telemetry._finish(self, duration, self._start_ns + int(duration * 1e9))
+
+class _NoopSpan:
+    """
+    Stand-in returned while telemetry is disabled.
+    """
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def traceparent(self) -> Optional[str]:
+        return None
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Telemetry:
+    """
+    Process-wide tracing and metrics. While disabled every call returns at once,
+    so the instrumented code pays about one attribute check per stage. When
+    enabled, span durations feed the `<namespace>_stage_duration_seconds`
+    histogram, other histograms and counters are kept by name, `prometheus_text`
+    renders them all in the Prometheus text format and, with a trace file, the
+    finished spans are appended to it as OTLP/JSON export requests, one per line.
+    """
+
+    def __init__(self, enabled: bool = False, service_name: str = "direktiv_agent",
+                 namespace: str = "direktiv_agent", trace_path: Optional[str] = None,
+                 metrics_path: Optional[str] = None) -> None:
+        self.enabled = enabled
+        self.service_name = service_name
+        self.namespace = namespace
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+
+        self._metrics: Dict[str, Any] = {}
+        self._spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Telemetry":
+        """
+        Builds the telemetry from TELEMETRY_ENABLED, TELEMETRY_TRACE_FILE (OTLP/JSON
+        spans, disabled when unset) and TELEMETRY_METRICS_FILE (Prometheus text
+        written on close, disabled when unset).
+        """
+        return cls(
+            enabled=os.getenv("TELEMETRY_ENABLED", "0") == "1",
+            trace_path=os.getenv("TELEMETRY_TRACE_FILE") or None,
+            metrics_path=os.getenv("TELEMETRY_METRICS_FILE") or None
+        )
+
+    def configure(self, service_name: str, namespace: str) -> None:
+        """
+        Names the process in the exported spans and prefixes its metric names, so
+        that the metrics of the agent and of its MCP servers can be served together.
+        """
+        self.service_name = service_name
+        self.namespace = namespace
+
+    def span(self, name: str, trace_id: Optional[str] = None, parent: Optional[str] = None,
+             kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+        """
+        Returns a context manager timing the stage `name`. The span continues
+        the current span's trace unless `parent` (a W3C traceparent received from
+        another process) or `trace_id` (e.g. the session id) starts it elsewhere.
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+
+        parent_id = None
+        if parent:
+            _, trace_id, parent_id, _ = parent.split("-")
+        elif trace_id is None:
+            current = _current_span.get()
+            if current is not None:
+                trace_id, parent_id = current.trace_id, current.span_id
+
+        if trace_id is None:
+            trace_id = f"{random.getrandbits(128):032x}"
+
+        return Span(self, name, trace_id, parent_id, kind, attributes)
+
+    def current_traceparent(self) -> Optional[str]:
+        current = _current_span.get() if self.enabled else None
+        return current.traceparent() if current is not None else None
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels: Any) -> None:
+        if not self.enabled:
+            return
+
+        key = tuple(sorted((label, str(label_value)) for label, label_value in labels.items()))
+        with self._lock:
+            histogram = self._metrics.get(name)
+            if histogram is None:
+                histogram = self._metrics[name] = Histogram(f"{self.namespace}_{name}", help_text)
+            histogram.observe(value, key)
+
+    def increment(self, name: str, value: float = 1, help_text: str = "", **labels: Any) -> None:
+        if not self.enabled:
+            return
+
+        key = tuple(sorted((label, str(label_value)) for label, label_value in labels.items()))
+        with self._lock:
+            counter = self._metrics.get(name)
+            if counter is None:
+                counter = self._metrics[name] = Counter(f"{self.namespace}_{name}", help_text)
+            counter.increment(value, key)
+
+    def _finish(self, span: Span, duration: float, end_ns: int) -> None:
+        self.observe("stage_duration_seconds", duration, "Duration of the traced request stages.",
+                     stage=span.name, status="error" if span.error else "ok")
+
+        if self.trace_path is None:
+            return
+
+        record = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span._start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()]
+        }
+        if span.parent_id:
+            record["parentSpanId"] = span.parent_id
+        if span.error:
+            record["status"] = {"code": STATUS_CODE_ERROR, "message": span.error}
+
+        with self._lock:
+            self._spans.append(record)
+            # a finished root span completes its trace in this process
+            if len(self._spans) >= SPAN_FLUSH_SIZE or span.parent_id is None or span.kind == SPAN_KIND_SERVER:
+                self._flush_spans()
+
+    def _flush_spans(self) -> None:
+        if not self._spans:
+            return
+
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "direktiv"}, "spans": self._spans}]
+        }]}
+        self._spans = []
+
+        try:
+            # one line per write, so that the agent and its servers can share the file
+            with open(self.trace_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(request, ensure_ascii=False) + "\n")
+        except OSError as err:
+            logger.warning(f"Spans could not be written to {self.trace_path}: {err}")
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            lines = []
+            for name in sorted(self._metrics):
+                lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def flush(self) -> None:
+        with self._lock:
+            if self.trace_path is not None:
+                self._flush_spans()
+
+        if self.enabled and self.metrics_path is not None:
+            with open(self.metrics_path, "w", encoding="utf-8") as file:
+                file.write(self.prometheus_text())
+
+# Shared by the modules of a process, configured from the environment
+telemetry = Telemetry.from_env()